@@ -0,0 +1,214 @@
+"""Battle royale view: the player's board surrounded by dozens of bot boards.
+
+Opponent boards are drawn as tiny images into one atlas surface. A slot is
+only re-rendered when its board changed (a lock, a line clear or garbage,
+tracked through Board.version), and every frame blits all the slots with a
+single Surface.blits call, so fifty boards cost about as much as one.
+
+Usage:
+    python battle_view.py bench [--opponents N] [--frames N] [--size WxH]
+"""
+import argparse
+import os
+import random
+import sys
+import time
+from constants import (
+    GRID_HEIGHT, BG_COLOR, GRID_COLOR, REPLAY_TICK, SCREEN_WIDTH, SCREEN_HEIGHT,
+    BATTLE_OPPONENTS, BATTLE_MAX_CELL_SIZE, BATTLE_BOT_MISTAKES, BATTLE_FRAME_BUDGET_MS
+)
+
+# Gap between mini boards, in pixels
+SLOT_GAP = 4
+# Width of the main game's sidebar, drawn right of its board
+SIDEBAR_WIDTH = 180
+# Darkening applied to eliminated boards
+ELIMINATED_TINT = (90, 90, 90)
+# Opponent ticks simulated per frame at most, so a slow frame cannot snowball
+MAX_TICKS_PER_FRAME = 4
+
+
+class MiniBoardAtlas:
+    """One surface holding a small image of every opponent board"""
+
+    def __init__(self, slots, board_width, rows, cell_size):
+        import pygame
+
+        self.cell_size = cell_size
+        self.rows = rows
+        self.slot_width = board_width * cell_size
+        self.slot_height = rows * cell_size
+        self.columns = max(1, int(slots ** 0.5))
+        atlas_rows = (slots + self.columns - 1) // self.columns
+        self.surface = pygame.Surface((self.columns * self.slot_width, atlas_rows * self.slot_height))
+        self.areas = [
+            pygame.Rect(
+                (slot % self.columns) * self.slot_width, (slot // self.columns) * self.slot_height,
+                self.slot_width, self.slot_height
+            )
+            for slot in range(slots)
+        ]
+        # (board, version, eliminated) last rendered into each slot
+        self.rendered = [None] * slots
+
+    def render(self, slot, board, eliminated=False):
+        """Redraw a slot if its board changed since the last render"""
+        key = (board, board.version, eliminated)
+        if self.rendered[slot] == key:
+            return False
+        self.rendered[slot] = key
+
+        import pygame
+
+        area = self.areas[slot]
+        surface = self.surface
+        cell = self.cell_size
+        surface.fill(GRID_COLOR, area)
+
+        # Only the materialized rows can hold blocks; show the bottom `rows` of them
+        bottom = area.bottom
+        for index, row in enumerate(board.stack[:self.rows]):
+            y = bottom - (index + 1) * cell
+            for x, color in enumerate(row):
+                if color:
+                    surface.fill(color, (area.x + x * cell, y, cell, cell))
+
+        if eliminated:
+            surface.fill(ELIMINATED_TINT, area, special_flags=pygame.BLEND_MULT)
+        return True
+
+
+class BattleView:
+    """The player's Game plus headless bot opponents drawn from an atlas"""
+
+    def __init__(self, game, opponents=BATTLE_OPPONENTS):
+        self.game = game
+        self.opponent_count = opponents
+        self.opponents = []
+        self.controllers = []
+        self.tick_time = 0
+        self.atlas = None
+        self.positions = []
+        if game.screen is not None:
+            self.resize(game.screen)
+
+    def reset(self, seed=None):
+        """Restart the player's game and every opponent"""
+        from game import Game
+        from bot import greedy_controller
+
+        self.game.reset(seed)
+        rng = random.Random(seed)
+        self.opponents = []
+        self.controllers = []
+        for _ in range(self.opponent_count):
+            bot_seed = rng.getrandbits(32)
+            self.opponents.append(Game(None, None, seed=bot_seed,
+                                       width=self.game.grid.width, height=self.game.grid.height))
+            self.controllers.append(greedy_controller(bot_seed, rng.uniform(*BATTLE_BOT_MISTAKES)))
+        self.tick_time = 0
+
+    def alive(self):
+        """Number of opponents still playing"""
+        return sum(not opponent.game_over for opponent in self.opponents)
+
+    def resize(self, screen):
+        """Lay the mini boards out in the margins left and right of the main board"""
+        game = self.game
+        board_width = game.grid.width
+        rows = min(game.grid.height, GRID_HEIGHT)
+        left = max(0, game.grid_offset_x - SLOT_GAP * 2)
+        right_x = game.grid_offset_x + board_width * game.cell_size + 20 + SIDEBAR_WIDTH + SLOT_GAP * 2
+        right = max(0, screen.get_width() - right_x)
+        height = screen.get_height()
+
+        # Largest cell size that fits every board, else the smallest one and drop the rest
+        for cell_size in range(BATTLE_MAX_CELL_SIZE, 0, -1):
+            slot_width = board_width * cell_size + SLOT_GAP
+            slot_height = rows * cell_size + SLOT_GAP
+            per_column = height // slot_height
+            left_columns = left // slot_width
+            right_columns = right // slot_width
+            if (left_columns + right_columns) * per_column >= self.opponent_count:
+                break
+
+        cells = [(SLOT_GAP + column * slot_width, row) for column in range(left_columns)
+                 for row in range(per_column)]
+        cells += [(right_x + column * slot_width, row) for column in range(right_columns)
+                  for row in range(per_column)]
+        top = (height - per_column * slot_height + SLOT_GAP) // 2
+        self.positions = [(x, top + row * slot_height) for x, row in cells[:self.opponent_count]]
+        self.atlas = MiniBoardAtlas(self.opponent_count, board_width, rows, cell_size)
+
+    def update(self, dt):
+        """Advance the player's game by dt and the opponents at the fixed tick"""
+        from bot import bot_step
+
+        self.tick_time = min(self.tick_time + dt, MAX_TICKS_PER_FRAME * REPLAY_TICK)
+        while self.tick_time >= REPLAY_TICK:
+            self.tick_time -= REPLAY_TICK
+            for opponent, controller in zip(self.opponents, self.controllers):
+                if not opponent.game_over:
+                    bot_step(opponent, controller)
+        return self.game.update(dt)
+
+    def draw(self):
+        """Draw the main board, then every mini board in one blit call"""
+        self.game.draw()
+        atlas = self.atlas
+        for slot, opponent in enumerate(self.opponents[:len(self.positions)]):
+            atlas.render(slot, opponent.grid, opponent.game_over)
+        self.game.screen.blits(
+            [(atlas.surface, position, area) for position, area in zip(self.positions, atlas.areas)],
+            doreturn=False
+        )
+
+
+def bench(opponents, frames, size):
+    """Time update plus draw per frame against the frame budget"""
+    os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+    import pygame
+    from game import Game
+    from main import load_fonts
+
+    pygame.init()
+    screen = pygame.display.set_mode(size)
+    main_font, _ = load_fonts()
+    view = BattleView(Game(screen, main_font, seed=0), opponents)
+    view.reset(seed=0)
+
+    times = []
+    for _ in range(frames):
+        start = time.perf_counter()
+        screen.fill(BG_COLOR)
+        view.update(REPLAY_TICK)
+        view.draw()
+        times.append((time.perf_counter() - start) * 1000)
+    pygame.quit()
+
+    times.sort()
+    mean = sum(times) / len(times)
+    p99 = times[min(len(times) - 1, int(len(times) * 0.99))]
+    print(f"{opponents} opponents ({len(view.positions)} shown, {view.alive()} alive), "
+          f"{frames} frames at {size[0]}x{size[1]}: "
+          f"mean {mean:.2f} ms, p99 {p99:.2f} ms, max {times[-1]:.2f} ms "
+          f"(budget {BATTLE_FRAME_BUDGET_MS} ms)")
+    return p99 <= BATTLE_FRAME_BUDGET_MS
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    bench_parser = commands.add_parser("bench", help="measure frame time with many opponents")
+    bench_parser.add_argument("--opponents", type=int, default=BATTLE_OPPONENTS)
+    bench_parser.add_argument("--frames", type=int, default=600)
+    bench_parser.add_argument("--size", default=f"{SCREEN_WIDTH}x{SCREEN_HEIGHT}")
+
+    args = parser.parse_args()
+    width, height = (int(value) for value in args.size.split("x"))
+    sys.exit(0 if bench(args.opponents, args.frames, (width, height)) else 1)
+
+
+if __name__ == "__main__":
+    main()
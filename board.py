@@ -0,0 +1,116 @@
+from constants import (
+    GRID_WIDTH, GRID_HEIGHT, MIN_GRID_WIDTH, MAX_GRID_WIDTH, MAX_GRID_HEIGHT
+)
+
+
+class Board:
+    """Playfield with sparse row storage.
+
+    Only the rows from the bottom of the board up to the top of the stack are
+    materialized, kept bottom-up in `stack` (stack[0] is row height - 1).
+    Every row above `top` is empty, so lookups, clears and drawing only pay
+    for the occupied part of the board however tall it is.
+
+    board[y][x] reads like the old list-of-lists grid; writes go through set().
+    """
+
+    def __init__(self, width=GRID_WIDTH, height=GRID_HEIGHT):
+        if not MIN_GRID_WIDTH <= width <= MAX_GRID_WIDTH:
+            raise ValueError(f"board width must be between {MIN_GRID_WIDTH} and {MAX_GRID_WIDTH}")
+        if not 1 <= height <= MAX_GRID_HEIGHT:
+            raise ValueError(f"board height must be between 1 and {MAX_GRID_HEIGHT}")
+        self.width = width
+        self.height = height
+        self.stack = []
+        self.counts = []  # Filled cells per materialized row
+        self.top = height  # First materialized row, height when the board is empty
+        self.version = 0   # Bumped on every change so renderers can cache the board
+        self.empty_row = (None,) * width
+
+    def __len__(self):
+        return self.height
+
+    def __getitem__(self, y):
+        """Return row y (a shared read-only empty row above the stack)"""
+        if self.top <= y < self.height:
+            return self.stack[self.height - 1 - y]
+        if 0 <= y < self.top:
+            return self.empty_row
+        raise IndexError(y)
+
+    def __iter__(self):
+        """Yield every row from top to bottom"""
+        for _ in range(self.top):
+            yield self.empty_row
+        yield from reversed(self.stack)
+
+    def get(self, x, y):
+        return self[y][x]
+
+    def set(self, x, y, color):
+        """Set one cell, materializing rows up to y if needed"""
+        index = self.height - 1 - y
+        while len(self.stack) <= index:
+            self.stack.append([None] * self.width)
+            self.counts.append(0)
+        row = self.stack[index]
+        if row[x] is None and color is not None:
+            self.counts[index] += 1
+        elif row[x] is not None and color is None:
+            self.counts[index] -= 1
+        row[x] = color
+        self._trim()
+
+    def is_full(self, y):
+        """Check if row y has no empty cell"""
+        return y >= self.top and self.counts[self.height - 1 - y] == self.width
+
+    def is_empty(self):
+        return not self.stack
+
+    def remove_row(self, y):
+        """Remove row y and return it; the rows above fall by one"""
+        if y < self.top:
+            return list(self.empty_row)
+        index = self.height - 1 - y
+        self.counts.pop(index)
+        row = self.stack.pop(index)
+        self._trim()
+        return row
+
+    def insert_row(self, y, row=None):
+        """Insert a row at y, pushing row y and everything above it up by one.
+
+        Returns the row pushed out of the top of the board.
+        """
+        if row is None:
+            row = [None] * self.width
+        index = self.height - 1 - y
+        while len(self.stack) < index:
+            self.stack.append([None] * self.width)
+            self.counts.append(0)
+        self.stack.insert(index, row)
+        self.counts.insert(index, sum(cell is not None for cell in row))
+
+        pushed_out = list(self.empty_row)
+        if len(self.stack) > self.height:
+            self.counts.pop()
+            pushed_out = self.stack.pop()
+        self._trim()
+        return pushed_out
+
+    def _trim(self):
+        """Drop empty rows from the top of the stack and update `top`"""
+        while self.counts and not self.counts[-1]:
+            self.counts.pop()
+            self.stack.pop()
+        self.top = self.height - len(self.stack)
+        self.version += 1
+
+    def copy(self):
+        board = Board(self.width, self.height)
+        board.stack = [list(row) for row in self.stack]
+        board.counts = list(self.counts)
+        board.top = self.top
+        board.version = self.version
+        return board
@@ -0,0 +1,133 @@
+"""A greedy bot that plays Game through input bits, like a versus controller.
+
+For every new piece it tries each rotation and column, scores the landing
+spot on aggregate height, completed lines, holes and bumpiness, and then
+plays the rotations, moves and hard drop one action per tick.
+"""
+import random
+import replay
+from replay import input_bits
+from tetrimino import Tetrimino, collides
+from constants import REPLAY_TICK
+
+# Weights of the placement score
+HEIGHT_WEIGHT = -0.51
+LINES_WEIGHT = 0.76
+HOLES_WEIGHT = -0.36
+BUMPINESS_WEIGHT = -0.18
+
+
+def column_heights(board):
+    """Return the stack height of every column"""
+    heights = [0] * board.width
+    for index, row in enumerate(board.stack):
+        for x, cell in enumerate(row):
+            if cell:
+                heights[x] = index + 1
+    return heights
+
+
+def score_placement(board, heights, bumpiness, x, y, blocks):
+    """Score a piece whose `blocks` rest at (x, y)"""
+    height = board.height
+    columns = {}
+    rows = {}
+    for block_x, block_y in blocks:
+        block_x += x
+        block_y += y
+        top, bottom = columns.get(block_x, (block_y, block_y))
+        columns[block_x] = (min(top, block_y), max(bottom, block_y))
+        rows[block_y] = rows.get(block_y, 0) + 1
+
+    # Only the touched columns and their neighbours change height and bumpiness
+    new_heights = {column: height - top for column, (top, _) in columns.items()}
+    raised = sum(new_heights[column] - heights[column] for column in columns)
+    holes = sum(height - heights[column] - bottom - 1 for column, (_, bottom) in columns.items())
+    edges = set()
+    for column in columns:
+        edges.update((column - 1, column))
+    for edge in edges:
+        if 0 <= edge < board.width - 1:
+            left = heights[edge]
+            right = heights[edge + 1]
+            bumpiness -= abs(left - right)
+            bumpiness += abs(new_heights.get(edge, left) - new_heights.get(edge + 1, right))
+
+    counts = board.counts
+    lines = sum(
+        1 for row, added in rows.items()
+        if (counts[height - 1 - row] if row >= board.top else 0) + added == board.width
+    )
+    return (HEIGHT_WEIGHT * (sum(heights) + raised) + LINES_WEIGHT * lines
+            + HOLES_WEIGHT * holes + BUMPINESS_WEIGHT * bumpiness)
+
+
+def plan_placement(game):
+    """Return the best (rotations, target_x) for the current piece"""
+    board = game.grid
+    piece = game.current_piece
+    heights = column_heights(board)
+    bumpiness = sum(abs(heights[x] - heights[x + 1]) for x in range(board.width - 1))
+    best = None
+    best_plan = (0, piece.x)
+    probe = Tetrimino(piece.shape_type, piece.x, piece.y, game.rotation_system)
+    probe.rotation = piece.rotation
+    for rotations in range(4):
+        if rotations and not probe.rotate(board):
+            break
+        blocks = probe.shapes[probe.rotation]
+        # Columns reachable by sliding left and right from where the rotation left the piece
+        low = probe.x
+        while not collides(board, low - 1, probe.y, blocks):
+            low -= 1
+        high = probe.x
+        while not collides(board, high + 1, probe.y, blocks):
+            high += 1
+        for x in range(low, high + 1):
+            # A hard drop stops on the highest filled cell under each block
+            y = min(board.height - heights[x + block_x] - 1 - block_y for block_x, block_y in blocks)
+            score = score_placement(board, heights, bumpiness, x, max(y, probe.y), blocks)
+            if best is None or score > best:
+                best = score
+                best_plan = (rotations, x)
+    return best_plan
+
+
+def greedy_controller(seed=0, mistake_rate=0.0):
+    """Return a controller playing greedy placements.
+
+    With mistake_rate, that share of pieces is dropped in a random column
+    instead, which keeps bot matches from running forever.
+    """
+    rng = random.Random(seed)
+    state = {"piece": None, "plan": []}
+
+    def controller(game):
+        piece = game.current_piece
+        if game.clearing_lines or game.game_over:
+            return 0
+        if piece is not state["piece"]:
+            state["piece"] = piece
+            if rng.random() < mistake_rate:
+                rotations, target_x = rng.randrange(4), rng.randrange(game.grid.width)
+            else:
+                rotations, target_x = plan_placement(game)
+            state["plan"] = [replay.ROTATE_CW] * rotations
+            state["target"] = target_x
+        plan = state["plan"]
+        if plan:
+            return input_bits(plan.pop(0))
+        step = (piece.x < state["target"]) - (piece.x > state["target"])
+        if step and not collides(game.grid, piece.x + step, piece.y, piece.shapes[piece.rotation]):
+            return input_bits(replay.RIGHT if step > 0 else replay.LEFT)
+        return input_bits(replay.HARD_DROP)
+    return controller
+
+
+def bot_step(game, controller):
+    """Advance a bot-controlled game by one tick"""
+    bits = controller(game)
+    for action in replay.INPUT_ACTIONS:
+        if bits & (1 << action):
+            replay.apply_action(game, action)
+    game.update(REPLAY_TICK)
@@ -0,0 +1,94 @@
+"""Check the import-time budget of the game modules.
+
+Runs a fresh interpreter under ``python -X importtime``, imports the game
+modules the way the game does at startup, and fails when the cumulative
+import time exceeds STARTUP_IMPORT_BUDGET_MS, when pygame gets pulled in
+eagerly, or when a headless import of game loads the display or the
+leaderboard database. CI runs it on every push (.github/workflows/startup.yml).
+
+Usage: python check_startup.py [--budget MS] [--runs N]
+"""
+import argparse
+import os
+import subprocess
+import sys
+from constants import STARTUP_IMPORT_BUDGET_MS, STARTUP_CHECK_MODULES
+
+# Modules that must only be imported by rendering and audio paths
+FORBIDDEN_MODULES = ("pygame",)
+
+# What headless tools (replays, bots, servers) import, and what that must not load:
+# the display and the leaderboard database are only for the game window
+HEADLESS_MODULES = ("game",)
+HEADLESS_FORBIDDEN_MODULES = ("pygame", "sqlite3", "leaderboard")
+
+
+def measure_imports(modules):
+    """Import modules in a fresh interpreter and return {module: cumulative_us}"""
+    code = "; ".join(f"import {name}" for name in modules)
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        cwd=os.path.dirname(os.path.abspath(__file__)),
+        capture_output=True,
+        text=True,
+        check=True
+    )
+
+    # Lines look like: "import time:       123 |        456 |   package.module"
+    timings = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        fields = line[len("import time:"):].split("|")
+        if len(fields) != 3 or not fields[1].strip().isdigit():
+            continue
+        name = fields[2].strip()
+        timings[name] = int(fields[1])
+    return timings
+
+
+def check_startup(budget_ms=STARTUP_IMPORT_BUDGET_MS, runs=3, modules=STARTUP_CHECK_MODULES):
+    """Return a list of budget violations (empty when the check passes)"""
+    best_total_us = None
+    timings = {}
+    # Take the best of several runs to filter out disk-cache and scheduler noise
+    for _ in range(runs):
+        timings = measure_imports(modules)
+        total_us = sum(timings.get(name, 0) for name in modules)
+        if best_total_us is None or total_us < best_total_us:
+            best_total_us = total_us
+
+    problems = []
+    for name in timings:
+        if name.split(".")[0] in FORBIDDEN_MODULES:
+            problems.append(f"{name} is imported at startup")
+
+    for name in measure_imports(HEADLESS_MODULES):
+        if name.split(".")[0] in HEADLESS_FORBIDDEN_MODULES:
+            problems.append(f"{name} is imported by a headless {', '.join(HEADLESS_MODULES)} import")
+
+    total_ms = best_total_us / 1000.0
+    print(f"Startup import time: {total_ms:.1f} ms (budget {budget_ms} ms)")
+    for name in modules:
+        print(f"  {name:<12} {timings.get(name, 0) / 1000.0:8.1f} ms")
+    if total_ms > budget_ms:
+        problems.append(f"import time {total_ms:.1f} ms exceeds budget of {budget_ms} ms")
+    return problems
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Check the game's import-time budget")
+    parser.add_argument("--budget", type=float, default=STARTUP_IMPORT_BUDGET_MS,
+                        help="maximum cumulative import time in milliseconds")
+    parser.add_argument("--runs", type=int, default=3,
+                        help="number of measurements to take the best of")
+    args = parser.parse_args()
+
+    problems = check_startup(args.budget, args.runs)
+    for problem in problems:
+        print(f"FAIL: {problem}")
+    return 1 if problems else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -7,12 +7,22 @@ GRID_WIDTH = 10
 GRID_HEIGHT = 20
 CELL_SIZE = 30
 
+# Board size limits for custom games
+MIN_GRID_WIDTH = 4
+MAX_GRID_WIDTH = 64
+MAX_GRID_HEIGHT = 8192
+MIN_CELL_SIZE = 4
+
 # Colors
 BG_COLOR = (20, 20, 30)
 GRID_COLOR = (40, 40, 50)
 WHITE = (255, 255, 255)
 GRAY = (100, 100, 100)
 BLACK = (0, 0, 0)
+GARBAGE_COLOR = (90, 90, 100)
+
+# Tetrimino types, in the order used by compiled tables and binary formats
+PIECE_TYPES = "IOTSZJL"
 
 # Tetrimino colors
 COLORS = {
@@ -87,6 +97,9 @@ WALL_KICK_I = {
     "0->3": [(0, 0), (-1, 0), (2, 0), (-1, -2), (2, 1)]
 }
 
+# Rotation system used by default ("srs", "classic" or "ars", see rotation.py)
+ROTATION_SYSTEM = "srs"
+
 # Game settings
 INITIAL_FALL_SPEED = 1.0  # Pieces per second
 SOFT_DROP_FACTOR = 5.0    # How much faster when soft dropping
@@ -94,13 +107,42 @@ LEVEL_SPEED_FACTOR = 0.1  # How much faster per level
 LINES_PER_LEVEL = 10      # Lines needed to advance a level
 MAX_LEVEL = 15            # Maximum level
 
-# Key repeat settings
-KEY_REPEAT_DELAY = 170    # ms before key starts repeating
-KEY_REPEAT_INTERVAL = 50  # ms between repeats
+# Input settings (see input_engine.py)
+FRAME_RATE = 60           # Frames per second the main loop runs at
+KEY_REPEAT_DELAY = 170    # DAS: ms a left/right key is held before it repeats
+KEY_REPEAT_INTERVAL = 50  # ARR: ms between repeats, 0 to move straight to the wall
+INPUT_POLL_MS = 1         # Event polling interval while waiting for the next frame
+INPUT_METRICS_WINDOW = 600  # Recent inputs kept for the latency metrics
 
 # Animation settings
 LINE_CLEAR_ANIMATION_DURATION = 0.5  # seconds
 PIECE_APPEAR_ANIMATION_DURATION = 0.2  # seconds
+MENU_DECORATION_CELL_SIZE = 20
+MENU_DECORATION_SPEED = 12.0   # Degrees per second the menu pieces turn
+MENU_DECORATION_FRAMES = 72    # Pre-rendered angles per menu piece
+
+# Render target settings (see render_target.py)
+RENDER_RESOLUTION = (SCREEN_WIDTH, SCREEN_HEIGHT)  # Internal resolution, None to render at the window size
+RENDER_INTEGER_SCALING = True  # Upscale by whole factors only, letterboxing the rest
+RESIZE_DEBOUNCE_MS = 250       # Quiet time after the last resize event before relayout
+
+# Rendering quality tiers, from best to cheapest (see quality.py)
+QUALITY_FULL = 0            # Bevelled blocks, translucent ghost, animations
+QUALITY_NO_BEVELS = 1       # Flat blocks
+QUALITY_SOLID_GHOST = 2     # Ghost piece drawn as a plain outline
+QUALITY_NO_ANIMATIONS = 3   # No piece fade-in, line flash or particles
+QUALITY_LOW_RESOLUTION = 4  # Board drawn at a lower resolution and scaled up
+QUALITY_LOW_RESOLUTION_SCALE = 0.5
+QUALITY_TIER = None          # Fixed tier, None to adapt to frame times
+QUALITY_FRAME_BUDGET_MS = 1000 / 60
+QUALITY_DOWN_FRAMES = 30     # Frames averaging over budget before stepping down
+QUALITY_UP_FRAMES = 180      # Frames averaging under the headroom before stepping up
+QUALITY_HEADROOM = 0.6       # Share of the budget frames must stay under to step up
+
+# Particle effects (see particles.py)
+PARTICLE_CAPACITY = 8192   # Live particles at most; further emissions are dropped
+PARTICLE_GRAVITY = 40.0    # Cells per second squared
+PARTICLE_FADE_STEPS = 16   # Cached sprite alphas per color
 
 # Scoring system
 SCORE_SINGLE = 100
@@ -111,4 +153,51 @@ SCORE_SOFT_DROP = 1
 SCORE_HARD_DROP = 2
 
 # File paths
-HIGH_SCORE_FILE = "high_score.txt"
\ No newline at end of file
+HIGH_SCORE_FILE = "high_score.txt"  # Legacy single score, imported into the leaderboard
+LEADERBOARD_FILE = "leaderboard.db"
+
+# Leaderboard settings
+LEADERBOARD_SIZE = 10            # Scores kept per profile and mode
+LEADERBOARD_RETRY_DELAY = 0.5    # First wait before retrying a batch the database refused (s)
+LEADERBOARD_RETRY_MAX_DELAY = 8  # Cap of the doubling retry wait (s)
+LEADERBOARD_CLOSE_TIMEOUT = 60   # How long close() keeps retrying before dropping scores (s)
+
+# Startup budget (checked by check_startup.py)
+STARTUP_IMPORT_BUDGET_MS = 50  # Cumulative import time of the game modules
+# Imported in this order, dependencies first, so each module's cumulative time
+# only covers what it adds; leaderboard is opened by main() before the first frame
+STARTUP_CHECK_MODULES = (
+    "constants", "rotation", "tetrimino", "board", "telemetry", "leaderboard",
+    "game", "menu", "main"
+)
+
+# Replay settings
+REPLAY_TICK = 1 / 60      # Fixed simulation step used to record and replay games
+
+# Export settings (see export.py)
+EXPORT_FPS = 30               # Frames written per second of game time
+EXPORT_CHUNK_FRAMES = 600     # Simulation frames rendered per worker task
+EXPORT_BOT_FRAMES = 3600      # Length cap of exported bot games
+EXPORT_THUMBNAIL_CELL_SIZE = 6
+EXPORT_ENCODER = "ffmpeg"     # Encoder the video format pipes raw frames to
+
+# Versus settings
+VERSUS_PORT = 5555
+VERSUS_PLAYERS = 2        # Players per match
+VERSUS_INPUT_DELAY = 2    # Ticks between sampling an input and simulating it
+GARBAGE_LINES = (0, 0, 1, 2, 4)  # Garbage sent for 0, 1, 2, 3 or 4 cleared lines
+
+# Spectator settings
+SPECTATOR_PORT = 5556
+SPECTATOR_KEYFRAME_INTERVAL = 60  # Ticks between keyframes for viewers that fell behind
+SPECTATOR_MAX_BACKLOG = 30        # Queued frames before a viewer drops to keyframe-only
+
+# Telemetry settings
+TELEMETRY_FILE = None  # Path of the gameplay event log, None to disable
+TELEMETRY_FLUSH_BYTES = 64 * 1024  # Buffered event bytes before a background write
+
+# Battle royale settings
+BATTLE_OPPONENTS = 50            # Bot boards shown around the player's board
+BATTLE_MAX_CELL_SIZE = 8         # Largest cell size of a mini board
+BATTLE_BOT_MISTAKES = (0.01, 0.08)  # Range of the share of pieces each bot drops at random
+BATTLE_FRAME_BUDGET_MS = 16      # Frame time checked by battle_view.py bench
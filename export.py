@@ -0,0 +1,310 @@
+"""Render recorded or bot games offline to frames, clips and thumbnails.
+
+Games come from a replay archive or are played on the spot by seeded bots,
+then re-simulated headless under the SDL dummy driver and drawn with
+Game.draw into offscreen surfaces. Each game is split into ranges of
+EXPORT_CHUNK_FRAMES simulation frames. A first pass through the process pool
+simulates every game once without drawing and pickles its state (particles
+included) at each range start; the ranges are then rendered in parallel,
+each from its snapshot, so no frame is simulated twice. Everything is seeded,
+so the ranges join without seams.
+
+Formats: png (one image per frame), gif (requires Pillow) and video (raw
+frames piped to EXPORT_ENCODER, one segment per range, joined at the end).
+The thumbnails command only draws each game's final board.
+
+Usage:
+    python export.py frames [--archive PATH [--games I,J] | --bots N] [--format png|gif|video]
+                            [--out DIR] [--fps N] [--size WxH] [--workers N]
+    python export.py thumbnails [--archive PATH [--games I,J] | --bots N] [--out DIR]
+"""
+import argparse
+import importlib.util
+import os
+import pickle
+import shutil
+import subprocess
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+import replay
+from constants import (
+    GRID_HEIGHT, BG_COLOR, REPLAY_TICK, SCREEN_WIDTH, SCREEN_HEIGHT,
+    EXPORT_FPS, EXPORT_CHUNK_FRAMES, EXPORT_BOT_FRAMES, EXPORT_THUMBNAIL_CELL_SIZE, EXPORT_ENCODER
+)
+
+# Share of pieces exported bots drop at random, so their games end
+BOT_MISTAKE_RATE = 0.05
+
+# Per-process pygame state, set up by init_worker
+_font = None
+
+
+def record_bot_game(seed, max_frames=EXPORT_BOT_FRAMES):
+    """Play a seeded bot game headless; return (seed, blob, frames, rules)"""
+    from game import Game
+    from bot import greedy_controller
+
+    game = Game(None, None, seed=seed)
+    recorder = replay.ReplayRecorder(seed)
+    controller = greedy_controller(seed, BOT_MISTAKE_RATE)
+    while not game.game_over and recorder.frame < max_frames:
+        bits = controller(game)
+        for action in replay.INPUT_ACTIONS:
+            if bits & (1 << action):
+                recorder.record(action)
+                replay.apply_action(game, action)
+        game.update(REPLAY_TICK)
+        recorder.tick()
+    return seed, recorder.blob(), recorder.frame, game_rules(game.grid.width, game.grid.height, game.rotation_name)
+
+
+def game_rules(width, height, rotation_system):
+    """Game keyword arguments a recorded game must be re-simulated with"""
+    return {"width": width, "height": height, "rotation_system": rotation_system}
+
+
+def load_games(archive_path=None, indices=None, bots=0, seed=0):
+    """Return {index: (seed, blob, frames, rules)} for the games to export.
+
+    Archive games keep their archive index, bot games are numbered from 0.
+    """
+    if archive_path is None:
+        return {i: record_bot_game(seed + i) for i in range(bots)}
+    with replay.ReplayArchive(archive_path) as archive:
+        if indices is None:
+            indices = range(len(archive))
+        games = {}
+        for i in indices:
+            entry = archive.entry(i)
+            rules = game_rules(entry["width"], entry["height"], entry["rotation_system"])
+            games[i] = (entry["seed"], bytes(archive.blob(i)), entry["frames"], rules)
+        return games
+
+
+def simulate(game, blob, frames, start=0):
+    """Step a game through its recorded inputs from frame `start`, yielding each frame after it is simulated"""
+    inputs = replay.iter_inputs(blob)
+    pending = next(inputs, None)
+    while pending is not None and pending[0] < start:
+        pending = next(inputs, None)
+    for frame in range(start, frames):
+        if game.game_over:
+            return
+        while pending is not None and pending[0] == frame:
+            replay.apply_action(game, pending[1])
+            pending = next(inputs, None)
+        game.update(REPLAY_TICK)
+        yield frame
+
+
+def init_worker():
+    """Set up pygame in a pool process without opening a window"""
+    global _font
+    os.environ["SDL_VIDEODRIVER"] = "dummy"
+    os.environ["SDL_AUDIODRIVER"] = "dummy"
+    import pygame
+    from main import load_fonts
+
+    pygame.init()
+    _font, _ = load_fonts()
+
+
+def replay_game(seed, rules, screen):
+    """Create a Game with a recording's rules, drawing on `screen`, whose effects are seeded too"""
+    from game import Game
+
+    game = Game(screen, _font, seed=seed, **rules)
+    if game.effects:
+        from particles import ParticleSystem
+        # Same particles whichever worker renders a frame
+        game.effects = ParticleSystem(seed=seed)
+    return game
+
+
+def snapshot_game(task):
+    """Simulate one game without drawing; return {start: pickled Game} for each range start"""
+    import pygame
+
+    seed, blob, frames, rules, starts, size = task
+    # Simulate with the effects the rendered game has, then detach it from the screen
+    game = replay_game(seed, rules, pygame.Surface(size))
+    game.screen = game.font = None
+    starts = set(starts)
+    snapshots = {0: pickle.dumps(game)} if 0 in starts else {}
+    for frame in simulate(game, blob, frames):
+        if frame + 1 in starts:
+            snapshots[frame + 1] = pickle.dumps(game)
+    return snapshots
+
+
+def render_range(task):
+    """Render frames [start, end) of one game from its snapshot at start; return the number written"""
+    import pygame
+
+    index, snapshot, blob, frames, start, end, options = task
+    directory = os.path.join(options["out"], f"game_{index:04d}")
+    os.makedirs(directory, exist_ok=True)
+    screen = pygame.Surface(options["size"])
+    game = pickle.loads(snapshot)
+    game.font = _font
+    game.resize(screen)
+
+    encoder = None
+    if options["format"] == "video":
+        encoder = subprocess.Popen(
+            [options["encoder"], "-loglevel", "error", "-y",
+             "-f", "rawvideo", "-pix_fmt", "rgb24", "-s", "{}x{}".format(*options["size"]),
+             "-r", str(options["fps"]), "-i", "-", "-pix_fmt", "yuv420p",
+             os.path.join(directory, f"segment_{start:07d}.mp4")],
+            stdin=subprocess.PIPE
+        )
+
+    written = 0
+    try:
+        for frame in simulate(game, blob, min(frames, end), start):
+            if frame % options["step"]:
+                continue
+            screen.fill(BG_COLOR)
+            game.draw()
+            if encoder:
+                encoder.stdin.write(pygame.image.tobytes(screen, "RGB"))
+            else:
+                pygame.image.save(screen, os.path.join(directory, f"frame_{frame // options['step']:06d}.png"))
+            written += 1
+    finally:
+        if encoder:
+            encoder.stdin.close()
+            if encoder.wait():
+                raise RuntimeError(f"{options['encoder']} failed on game {index} frames {start}-{end}")
+    return written
+
+
+def join_segments(directory, encoder):
+    """Concatenate a game's video segments into one file next to its directory"""
+    segments = sorted(name for name in os.listdir(directory) if name.startswith("segment_"))
+    listing = os.path.join(directory, "segments.txt")
+    with open(listing, "w") as f:
+        f.writelines(f"file '{name}'\n" for name in segments)
+    subprocess.run(
+        [encoder, "-loglevel", "error", "-y", "-f", "concat", "-safe", "0", "-i", listing,
+         "-c", "copy", directory + ".mp4"],
+        check=True
+    )
+    shutil.rmtree(directory)
+
+
+def write_gif(directory, fps):
+    """Assemble a game's PNG frames into an animated GIF next to its directory"""
+    from PIL import Image
+
+    names = sorted(name for name in os.listdir(directory) if name.startswith("frame_"))
+    frames = [Image.open(os.path.join(directory, name)).convert("P", palette=Image.ADAPTIVE) for name in names]
+    frames[0].save(directory + ".gif", save_all=True, append_images=frames[1:],
+                   duration=round(1000 / fps), loop=0)
+    shutil.rmtree(directory)
+
+
+def export_frames(games, out, fmt="png", fps=EXPORT_FPS, size=(SCREEN_WIDTH, SCREEN_HEIGHT),
+                  workers=None, chunk=EXPORT_CHUNK_FRAMES):
+    """Render every game's frames across a process pool; return the frame count"""
+    encoder = shutil.which(EXPORT_ENCODER)
+    if fmt == "video" and encoder is None:
+        raise RuntimeError(f"the video format needs {EXPORT_ENCODER} on the PATH")
+    if fmt == "gif" and importlib.util.find_spec("PIL") is None:
+        raise RuntimeError("the gif format needs Pillow (pip install pillow)")
+
+    # Ranges start on written frames so no frame is rendered twice
+    step = max(1, round(1 / (fps * REPLAY_TICK)))
+    chunk = max(step, chunk // step * step)
+    options = {"out": out, "format": fmt, "fps": fps, "size": size, "step": step, "encoder": encoder}
+
+    os.makedirs(out, exist_ok=True)
+    with ProcessPoolExecutor(workers, initializer=init_worker) as pool:
+        # One simulation per game; a range whose game ended before it gets no snapshot
+        snapshots = pool.map(snapshot_game, [
+            (seed, blob, frames, rules, range(0, frames, chunk), size)
+            for seed, blob, frames, rules in games.values()
+        ])
+        tasks = [
+            (index, snapshot, blob, frames, start, start + chunk, options)
+            for (index, (_, blob, frames, _)), starts in zip(games.items(), snapshots)
+            for start, snapshot in sorted(starts.items())
+        ]
+        written = sum(pool.map(render_range, tasks))
+
+    for index in games:
+        directory = os.path.join(out, f"game_{index:04d}")
+        if not os.path.isdir(directory):
+            continue
+        if fmt == "video":
+            join_segments(directory, encoder)
+        elif fmt == "gif":
+            write_gif(directory, fps)
+    return written
+
+
+def render_thumbnail(task):
+    """Draw the final board of one game into a small PNG"""
+    import pygame
+
+    index, seed, blob, frames, rules, out = task
+    game = replay_game(seed, rules, None)
+    for _ in simulate(game, blob, frames):
+        pass
+
+    # Show the bottom of tall boards, at most a standard board's height
+    game.visible_rows = min(game.grid.height, GRID_HEIGHT)
+    cell_size = EXPORT_THUMBNAIL_CELL_SIZE
+    thumbnail = pygame.Surface((game.grid.width * cell_size, game.visible_rows * cell_size))
+    game.draw_board(thumbnail, 0, 0, cell_size, game.grid.height - game.visible_rows)
+    path = os.path.join(out, f"thumbnail_{index:04d}.png")
+    pygame.image.save(thumbnail, path)
+    return path
+
+
+def export_thumbnails(games, out, workers=None):
+    """Write one board thumbnail per game across a process pool; return the paths"""
+    os.makedirs(out, exist_ok=True)
+    tasks = [(index, seed, blob, frames, rules, out) for index, (seed, blob, frames, rules) in games.items()]
+    with ProcessPoolExecutor(workers, initializer=init_worker) as pool:
+        return list(pool.map(render_thumbnail, tasks, chunksize=max(1, len(tasks) // 64)))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    commands = parser.add_subparsers(dest="command", required=True)
+    for name, help_text in (("frames", "render games to frames or clips"),
+                            ("thumbnails", "render the final board of each game")):
+        command = commands.add_parser(name, help=help_text)
+        source = command.add_mutually_exclusive_group(required=True)
+        source.add_argument("--archive", help="replay archive to export")
+        source.add_argument("--bots", type=int, help="number of seeded bot games to play and export")
+        command.add_argument("--games", help="comma-separated archive indices (default: all)")
+        command.add_argument("--seed", type=int, default=0, help="first bot seed")
+        command.add_argument("--out", default="export")
+        command.add_argument("--workers", type=int, help="worker processes (default: one per CPU)")
+    frames_parser = commands.choices["frames"]
+    frames_parser.add_argument("--format", choices=("png", "gif", "video"), default="png")
+    frames_parser.add_argument("--fps", type=int, default=EXPORT_FPS)
+    frames_parser.add_argument("--size", default=f"{SCREEN_WIDTH}x{SCREEN_HEIGHT}")
+    frames_parser.add_argument("--chunk", type=int, default=EXPORT_CHUNK_FRAMES)
+    args = parser.parse_args()
+
+    indices = [int(i) for i in args.games.split(",")] if args.games else None
+    games = load_games(args.archive, indices, args.bots or 0, args.seed)
+    start = time.perf_counter()
+    if args.command == "frames":
+        size = tuple(int(value) for value in args.size.split("x"))
+        written = export_frames(games, args.out, args.format, args.fps, size, args.workers, args.chunk)
+        elapsed = time.perf_counter() - start
+        print(f"{len(games)} games, {written} frames in {elapsed:.2f} s ({written / elapsed:.0f} frames/s)")
+    else:
+        paths = export_thumbnails(games, args.out, args.workers)
+        elapsed = time.perf_counter() - start
+        print(f"{len(paths)} thumbnails in {elapsed:.2f} s")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
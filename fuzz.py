@@ -0,0 +1,284 @@
+"""Differential fuzzing of the game rules against a candidate engine.
+
+Random seeded action sequences are played through the reference rules (a
+headless Game: Tetrimino.move/rotate/hard_drop, Game.place_piece and
+clear_lines) and through a candidate engine, comparing their state after
+every step. A mismatch is shrunk to a minimal sequence that still fails and
+printed as a repro. Cases are spread over worker processes.
+
+An engine is any callable engine(seed, width, height) returning an object
+with:
+    step(action)  apply one replay action (replay.NOOP for none), then
+                  advance the simulation by one REPLAY_TICK
+    state()       a tuple equal to ReferenceEngine.state() for the same game
+
+Without --candidate the reference is checked against a second instance of
+itself, which catches hidden nondeterminism.
+
+Usage: python fuzz.py [--candidate MODULE:ENGINE] [--cases N] [--steps N]
+                      [--seed N] [--workers N]
+"""
+import argparse
+import importlib
+import random
+import sys
+import time
+from functools import lru_cache
+from concurrent.futures import ProcessPoolExecutor
+import replay
+from constants import REPLAY_TICK, MIN_GRID_WIDTH, GRID_WIDTH, GRID_HEIGHT
+
+REFERENCE = "fuzz:ReferenceEngine"
+
+# Names of the fields of an engine state, in order
+STATE_FIELDS = ("game_over", "score", "lines", "level", "piece", "next_piece", "clearing_lines", "board")
+
+# Relative weights of the actions in generated sequences
+ACTION_WEIGHTS = {
+    replay.NOOP: 40,
+    replay.LEFT: 12,
+    replay.RIGHT: 12,
+    replay.ROTATE_CW: 8,
+    replay.ROTATE_CCW: 8,
+    replay.HARD_DROP: 6,
+    replay.SOFT_DROP_ON: 3,
+    replay.SOFT_DROP_OFF: 3
+}
+# Share of cases that mutate a greedy bot game, so lines get cleared
+BOT_CASE_RATE = 0.5
+BOT_CASE_GROUP = 20   # Consecutive cases sharing one bot game
+MAX_MUTATIONS = 8
+# Share of cases played on a random board size instead of the standard one
+ODD_BOARD_RATE = 0.25
+MAX_FUZZ_WIDTH = 16
+MAX_FUZZ_HEIGHT = 40
+
+
+class ReferenceEngine:
+    """The game rules as implemented by Game, run headless"""
+
+    def __init__(self, seed, width=GRID_WIDTH, height=GRID_HEIGHT):
+        from game import Game
+
+        self.game = Game(None, None, seed=seed, width=width, height=height)
+        self._board_version = None
+        self._board = None
+
+    def step(self, action):
+        if action != replay.NOOP:
+            replay.apply_action(self.game, action)
+        self.game.update(REPLAY_TICK)
+
+    def board(self):
+        """The stack as row tuples, bottom row first, up to the highest filled row"""
+        grid = self.game.grid
+        if grid.version != self._board_version:
+            self._board_version = grid.version
+            self._board = tuple(tuple(row) for row in grid.stack)
+        return self._board
+
+    def state(self):
+        game = self.game
+        piece = game.current_piece
+        return (
+            game.game_over, game.score, game.lines_cleared, game.level,
+            (piece.shape_type, piece.x, piece.y, piece.rotation) if piece else None,
+            game.next_piece.shape_type if game.next_piece else None,
+            tuple(game.clearing_lines), self.board()
+        )
+
+
+def load_engine(path):
+    """Import an engine given as 'module:callable'"""
+    module_name, _, name = path.partition(":")
+    return getattr(importlib.import_module(module_name), name)
+
+
+def run_case(reference, candidate, seed, width, height, actions):
+    """Play actions on both engines until they disagree or the game ends.
+
+    Returns (steps played, failure) where failure is None or
+    (step, expected state, actual state) at the first mismatch.
+    """
+    expected_engine = reference(seed, width, height)
+    actual_engine = candidate(seed, width, height)
+    expected, actual = expected_engine.state(), actual_engine.state()
+    if expected != actual:
+        return 0, (-1, expected, actual)
+    for step, action in enumerate(actions):
+        expected_engine.step(action)
+        actual_engine.step(action)
+        expected, actual = expected_engine.state(), actual_engine.state()
+        if expected != actual:
+            return step + 1, (step, expected, actual)
+        if expected[0]:
+            # Both games are over: nothing left to compare
+            return step + 1, None
+    return len(actions), None
+
+
+def shrink(reference, candidate, seed, width, height, actions):
+    """Return a shorter action list that still makes the engines disagree"""
+    _, failure = run_case(reference, candidate, seed, width, height, actions)
+    actions = list(actions[:failure[0] + 1])
+
+    # Delta debugging: drop ever smaller chunks while the case keeps failing
+    chunk = len(actions) // 2
+    while chunk >= 1:
+        start = 0
+        while start < len(actions):
+            attempt = actions[:start] + actions[start + chunk:]
+            _, failure = run_case(reference, candidate, seed, width, height, attempt)
+            if failure:
+                actions = attempt[:failure[0] + 1]
+            else:
+                start += chunk
+        chunk //= 2
+
+    # Then turn the remaining actions into plain ticks where that still fails
+    for i, action in enumerate(actions):
+        if action != replay.NOOP:
+            attempt = actions[:i] + [replay.NOOP] + actions[i + 1:]
+            if run_case(reference, candidate, seed, width, height, attempt)[1]:
+                actions = attempt
+    return actions
+
+
+def random_actions(rng, count):
+    return rng.choices(list(ACTION_WEIGHTS), weights=list(ACTION_WEIGHTS.values()), k=count)
+
+
+def random_board(rng):
+    """Return the (width, height) of a case's board"""
+    if rng.random() < ODD_BOARD_RATE:
+        return rng.randint(MIN_GRID_WIDTH, MAX_FUZZ_WIDTH), rng.randint(4, MAX_FUZZ_HEIGHT)
+    return GRID_WIDTH, GRID_HEIGHT
+
+
+@lru_cache(maxsize=4)
+def bot_case(group, steps):
+    """Return (seed, width, height, actions) of the greedy bot playing a game"""
+    from bot import greedy_controller
+
+    rng = random.Random(group)
+    width, height = random_board(rng)
+    seed = rng.getrandbits(32)
+    engine = ReferenceEngine(seed, width, height)
+    controller = greedy_controller(rng.getrandbits(32))
+    actions = []
+    while len(actions) < steps and not engine.game.game_over:
+        bits = controller(engine.game)
+        action = bits.bit_length() - 1 if bits else replay.NOOP
+        engine.step(action)
+        actions.append(action)
+    return seed, width, height, tuple(actions)
+
+
+def mutate(rng, actions):
+    """Replace, insert or delete a few random actions"""
+    actions = list(actions)
+    for _ in range(rng.randint(1, MAX_MUTATIONS)):
+        position = rng.randrange(len(actions) + 1)
+        change = rng.randrange(3)
+        if change == 0 and position < len(actions):
+            actions[position] = random_actions(rng, 1)[0]
+        elif change == 1:
+            actions.insert(position, random_actions(rng, 1)[0])
+        elif position < len(actions):
+            del actions[position]
+    return actions
+
+
+def generate_case(case_seed, steps):
+    """Return (game seed, width, height, actions) for one case.
+
+    Bot cases mutate a bot game shared by BOT_CASE_GROUP consecutive cases:
+    they clear lines like the bot up to the first mutation, then diverge.
+    """
+    rng = random.Random(case_seed)
+    if rng.random() < BOT_CASE_RATE:
+        seed, width, height, actions = bot_case(case_seed // BOT_CASE_GROUP, steps)
+        return seed, width, height, mutate(rng, actions)
+    width, height = random_board(rng)
+    return rng.getrandbits(32), width, height, random_actions(rng, steps)
+
+
+def fuzz_batch(task):
+    """Worker: run a batch of cases; return (steps run, shrunk failures)"""
+    reference_path, candidate_path, case_seeds, steps = task
+    reference = load_engine(reference_path)
+    candidate = load_engine(candidate_path)
+    total = 0
+    failures = []
+    for case_seed in case_seeds:
+        seed, width, height, actions = generate_case(case_seed, steps)
+        played, failure = run_case(reference, candidate, seed, width, height, actions)
+        total += played
+        if failure is None:
+            continue
+        actions = shrink(reference, candidate, seed, width, height, actions)
+        step, expected, actual = run_case(reference, candidate, seed, width, height, actions)[1]
+        failures.append({"case": case_seed, "seed": seed, "width": width, "height": height,
+                         "actions": actions, "step": step, "expected": expected, "actual": actual})
+    return total, failures
+
+
+def fuzz(candidate=REFERENCE, cases=1000, steps=2000, seed=0, workers=None, batch=50):
+    """Fuzz `cases` sequences across a process pool; return (steps run, failures)"""
+    tasks = [
+        (REFERENCE, candidate, range(start, min(start + batch, seed + cases)), steps)
+        for start in range(seed, seed + cases, batch)
+    ]
+    total = 0
+    failures = {}
+    with ProcessPoolExecutor(workers) as pool:
+        for steps_run, batch_failures in pool.map(fuzz_batch, tasks):
+            total += steps_run
+            for failure in batch_failures:
+                # Cases mutating the same bot game often shrink to the same repro
+                key = (failure["seed"], failure["width"], failure["height"], tuple(failure["actions"]))
+                failures.setdefault(key, failure)
+    return total, list(failures.values())
+
+
+def describe(expected, actual):
+    """Yield a line per state field the engines disagree on"""
+    for name, expected_value, actual_value in zip(STATE_FIELDS, expected, actual):
+        if expected_value == actual_value:
+            continue
+        if name == "board":
+            rows = max(len(expected_value), len(actual_value))
+            differing = [
+                y for y in range(rows)
+                if expected_value[y:y + 1] != actual_value[y:y + 1]
+            ]
+            yield f"board: rows {differing} differ (0 is the bottom row)"
+        else:
+            yield f"{name}: expected {expected_value!r}, got {actual_value!r}"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--candidate", default=REFERENCE, help="engine to check, as MODULE:CALLABLE")
+    parser.add_argument("--cases", type=int, default=1000)
+    parser.add_argument("--steps", type=int, default=2000, help="actions per case")
+    parser.add_argument("--seed", type=int, default=0, help="first case seed")
+    parser.add_argument("--workers", type=int, help="worker processes (default: one per CPU)")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    total, failures = fuzz(args.candidate, args.cases, args.steps, args.seed, args.workers)
+    elapsed = time.perf_counter() - start
+    print(f"{args.cases} cases, {total} steps in {elapsed:.2f} s ({total / elapsed:.0f} steps/s), "
+          f"{len(failures)} failing")
+    for failure in failures:
+        print(f"\ncase {failure['case']}: seed {failure['seed']}, {failure['width']}x{failure['height']} board, "
+              f"diverges at step {failure['step']}")
+        print(f"  actions: {failure['actions']}")
+        for line in describe(failure["expected"], failure["actual"]):
+            print(f"  {line}")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
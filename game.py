@@ -1,37 +1,67 @@
-import pygame
 import random
-import os
-from tetrimino import Tetrimino
-from constants import *
+from tetrimino import Tetrimino, collides, draw_block
+from rotation import ROTATION_SYSTEMS
+from board import Board
+import telemetry
+from constants import (
+    PIECE_TYPES, ROTATION_SYSTEM, GRID_WIDTH, GRID_HEIGHT, MIN_CELL_SIZE, BG_COLOR, GRID_COLOR, WHITE, GRAY, GARBAGE_COLOR,
+    INITIAL_FALL_SPEED, SOFT_DROP_FACTOR, LEVEL_SPEED_FACTOR,
+    LINES_PER_LEVEL, MAX_LEVEL,
+    LINE_CLEAR_ANIMATION_DURATION,
+    QUALITY_FULL, QUALITY_NO_BEVELS, QUALITY_NO_ANIMATIONS, QUALITY_LOW_RESOLUTION, QUALITY_LOW_RESOLUTION_SCALE,
+    SCORE_SINGLE, SCORE_DOUBLE, SCORE_TRIPLE, SCORE_TETRIS,
+    SCORE_SOFT_DROP, SCORE_HARD_DROP
+)
 
 class Game:
-    def __init__(self, screen, font, place_sound, line_clear_sound, game_over_sound):
+    def __init__(self, screen, font, place_sound=None, line_clear_sound=None, game_over_sound=None,
+                 leaderboard=None, seed=None, profile="default", telemetry_log=None,
+                 rotation_system=ROTATION_SYSTEM, width=GRID_WIDTH, height=GRID_HEIGHT):
         self.screen = screen
         self.font = font
         self.place_sound = place_sound
         self.line_clear_sound = line_clear_sound
         self.game_over_sound = game_over_sound
+        self.leaderboard = leaderboard
+        self.profile = profile
+        self.telemetry = telemetry_log
+        self.rotation_name = rotation_system  # Key in ROTATION_SYSTEMS, stored with replays
+        self.rotation_system = ROTATION_SYSTEMS[rotation_system]
+        
+        # Seeded piece generator so a game can be reproduced from its seed
+        self.seed = random.randrange(2 ** 32) if seed is None else seed
+        self.rng = random.Random(self.seed)
         
         # Game state
-        self.grid = [[None for _ in range(GRID_WIDTH)] for _ in range(GRID_HEIGHT)]
+        self.grid = Board(width, height)
         self.current_piece = None
         self.next_piece = None
         self.score = 0
+        self.zen_mode = False
         self.high_score = self.load_high_score()
         self.level = 1
         self.lines_cleared = 0
         self.game_over = False
-        self.zen_mode = False
+        self.play_time = 0
+        self.score_recorded = False
+        self.piece_spawn_time = 0
+        # The log only opens a game on reset(): the game built at startup sits
+        # behind the menu and is reset when play starts, so it is never logged
+        self.telemetry_game = None
         
         # Animation state
         self.clearing_lines = []
         self.clear_animation_timer = 0
+        self.effects = None  # Particle system, only for games drawn on a screen
+        
+        # Rendering quality tier, set from the frame-time budget (see quality.py)
+        self.quality = QUALITY_FULL
+        self.low_resolution_board = None
+        self.scaled_board = None
+        self.empty_board_cache = {}
         
-        # Input handling
-        self.move_left = False
-        self.move_right = False
+        # Input handling (held left/right keys are handled by input_engine.py)
         self.move_down = False
-        self.move_timer = 0
         self.fall_timer = 0
         self.fall_speed = INITIAL_FALL_SPEED
         
@@ -49,22 +79,42 @@ class Game:
     def resize(self, screen):
         """Recalculate grid position when screen is resized"""
         self.screen = screen
+        if screen is None:
+            # Headless game: keep a nominal layout so draw() math stays valid
+            self.cell_size = 30
+            self.visible_rows = self.grid.height
+            self.grid_offset_x = 0
+            self.grid_offset_y = 0
+            return
+        
+        if self.effects is None:
+            try:
+                from particles import ParticleSystem
+                self.effects = ParticleSystem()
+            except ImportError:
+                # NumPy is optional: play without particle effects
+                self.effects = False
+        
+        self.empty_board_cache = {}
+        width, height = self.grid.width, self.grid.height
+        # Tall boards are shown through a window of at most GRID_HEIGHT rows' worth of space
         self.cell_size = min(
-            (screen.get_width() - 300) // GRID_WIDTH,
-            screen.get_height() // GRID_HEIGHT
+            (screen.get_width() - 300) // width,
+            screen.get_height() // min(height, GRID_HEIGHT)
         )
-        self.cell_size = max(15, min(self.cell_size, 40))  # Constrain cell size
+        self.cell_size = max(MIN_CELL_SIZE, min(self.cell_size, 40))  # Constrain cell size
+        self.visible_rows = min(height, screen.get_height() // self.cell_size)
         
         # Center the grid horizontally
-        self.grid_offset_x = (screen.get_width() - (GRID_WIDTH * self.cell_size + 200)) // 2
+        self.grid_offset_x = (screen.get_width() - (width * self.cell_size + 200)) // 2
         
         # Center the grid vertically
-        self.grid_offset_y = (screen.get_height() - GRID_HEIGHT * self.cell_size) // 2
+        self.grid_offset_y = (screen.get_height() - self.visible_rows * self.cell_size) // 2
     
     def refill_bag(self):
         """Refill the bag with one of each tetrimino and shuffle"""
-        self.tetrimino_bag = list('IOTSZJL')
-        random.shuffle(self.tetrimino_bag)
+        self.tetrimino_bag = list(PIECE_TYPES)
+        self.rng.shuffle(self.tetrimino_bag)
     
     def get_next_tetrimino(self):
         """Get the next tetrimino from the bag"""
@@ -72,7 +122,7 @@ class Game:
             self.refill_bag()
         
         shape_type = self.tetrimino_bag.pop()
-        tetrimino = Tetrimino(shape_type, GRID_WIDTH // 2 - 1, 0)
+        tetrimino = Tetrimino(shape_type, self.grid.width // 2 - 1, 0, self.rotation_system)
         # Update ghost position with the current grid
         tetrimino.update_ghost_position(self.grid)
         return tetrimino
@@ -86,31 +136,44 @@ class Game:
         
         self.next_piece = self.get_next_tetrimino()
         
+        self.piece_spawn_time = self.play_time
+        self.emit(telemetry.SPAWN)
+        
         # Check if the new piece overlaps with existing blocks (game over)
         if self.current_piece.collision(self.grid) and not self.zen_mode:
             self.game_over = True
+            self.emit(telemetry.GAME_OVER, value=self.score)
         
         # Update ghost position
         self.current_piece.update_ghost_position(self.grid)
     
     def place_piece(self):
         """Place the current piece on the grid"""
+        rows = set()
         for x, y in self.current_piece.get_blocks():
-            if 0 <= y < GRID_HEIGHT and 0 <= x < GRID_WIDTH:
-                self.grid[y][x] = self.current_piece.color
+            if 0 <= y < self.grid.height and 0 <= x < self.grid.width:
+                self.grid.set(x, y, self.current_piece.color)
+                rows.add(y)
+        
+        if self.telemetry:
+            decision_ms = int((self.play_time - self.piece_spawn_time) * 1000)
+            self.emit(telemetry.LOCK, arg=min(255, self.stack_height()), value=decision_ms)
         
-        self.place_sound.play()
+        if self.place_sound:
+            self.place_sound.play()
         
-        # Check for completed lines
-        completed_lines = []
-        for y in range(GRID_HEIGHT):
-            if all(self.grid[y]):
-                completed_lines.append(y)
+        # Only the rows the piece landed in can have been completed
+        completed_lines = sorted(y for y in rows if self.grid.is_full(y))
         
         if completed_lines:
             self.clearing_lines = completed_lines
             self.clear_animation_timer = LINE_CLEAR_ANIMATION_DURATION
-            self.line_clear_sound.play()
+            if self.animated:
+                self.effects.line_clear([
+                    (x, y, color) for y in completed_lines for x, color in enumerate(self.grid[y])
+                ])
+            if self.line_clear_sound:
+                self.line_clear_sound.play()
             
             # Update score based on number of lines cleared
             if len(completed_lines) == 1:
@@ -122,9 +185,16 @@ class Game:
             elif len(completed_lines) == 4:
                 self.score += SCORE_TETRIS * self.level
             
+            self.emit(telemetry.CLEAR, arg=len(completed_lines), value=self.score)
+            
             # Update lines cleared and level
+            old_level = self.level
             self.lines_cleared += len(completed_lines)
             self.level = min(MAX_LEVEL, 1 + self.lines_cleared // LINES_PER_LEVEL)
+            if self.level != old_level:
+                self.emit(telemetry.LEVEL, arg=self.level)
+                if self.animated:
+                    self.effects.level_up(self.grid.width, completed_lines[-1])
             
             # Update fall speed based on level
             self.fall_speed = INITIAL_FALL_SPEED + (self.level - 1) * LEVEL_SPEED_FACTOR
@@ -132,64 +202,116 @@ class Game:
             # No lines to clear, spawn next piece immediately
             self.spawn_piece()
     
+    def remove_row(self, y):
+        """Remove row y and return it; the rows above fall by one"""
+        return self.grid.remove_row(y)
+    
+    def insert_row(self, y, row=None):
+        """Insert a row at y, pushing the rows above up; returns the row pushed out of the top"""
+        return self.grid.insert_row(y, row)
+    
     def clear_lines(self):
         """Clear completed lines and move blocks down"""
-        # Sort lines in descending order to avoid shifting issues
-        self.clearing_lines.sort(reverse=True)
+        # Remove lines top-down: removing a line only shifts the rows above it,
+        # so the lines still to clear keep their indices
+        self.clearing_lines.sort()
         
         for line in self.clearing_lines:
-            # Remove the line
-            self.grid.pop(line)
-            # Add a new empty line at the top
-            self.grid.insert(0, [None for _ in range(GRID_WIDTH)])
+            self.remove_row(line)
         
         self.clearing_lines = []
         self.spawn_piece()
     
-    def handle_key_down(self, key):
-        """Handle key press events"""
-        if key == pygame.K_LEFT:
-            self.move_left = True
-            self.move_timer = 0
-            self.current_piece.move(-1, 0, self.grid)
-        
-        elif key == pygame.K_RIGHT:
-            self.move_right = True
-            self.move_timer = 0
-            self.current_piece.move(1, 0, self.grid)
-        
-        elif key == pygame.K_DOWN:
-            self.move_down = True
-        
-        elif key == pygame.K_UP:
-            self.current_piece.rotate(self.grid)
-        
-        elif key == pygame.K_SPACE:
-            # Hard drop
-            drop_distance = self.current_piece.hard_drop(self.grid)
-            self.score += drop_distance * SCORE_HARD_DROP
-            self.place_piece()
-        
-        elif key == pygame.K_z:
-            # Counter-clockwise rotation
-            self.current_piece.rotate(self.grid, clockwise=False)
+    def add_garbage(self, count, hole):
+        """Push `count` garbage rows with a gap at column `hole` up from the bottom"""
+        for _ in range(count):
+            row = [GARBAGE_COLOR for _ in range(self.grid.width)]
+            row[hole % self.grid.width] = None
+            # Blocks pushed out of the top mean the player topped out
+            if any(self.insert_row(self.grid.height - 1, row)):
+                self.game_over = True
+        
+        # Lift the falling piece clear of the new rows
+        piece = self.current_piece
+        if piece and not self.clearing_lines:
+            while piece.collision(self.grid) and piece.y > -4:
+                piece.y -= 1
+            piece.update_ghost_position(self.grid)
+        
+        # Rows queued for clearing moved up with the stack
+        self.clearing_lines = [y - count for y in self.clearing_lines if y - count >= 0]
+        if self.game_over:
+            self.emit(telemetry.GAME_OVER, value=self.score)
     
-    def handle_key_up(self, key):
-        """Handle key release events"""
-        if key == pygame.K_LEFT:
-            self.move_left = False
-        
-        elif key == pygame.K_RIGHT:
-            self.move_right = False
-        
-        elif key == pygame.K_DOWN:
-            self.move_down = False
+    def stack_height(self):
+        """Return the height of the highest placed block"""
+        return self.grid.height - self.grid.top
+    
+    def emit(self, event, arg=0, value=0):
+        """Record a telemetry event for the current piece"""
+        if self.telemetry_game is None:
+            return
+        piece = self.current_piece
+        if piece is None:
+            self.telemetry.emit(self.telemetry_game, int(self.play_time * 1000), event, arg=arg, value=value)
+            return
+        self.telemetry.emit(
+            self.telemetry_game, int(self.play_time * 1000), event,
+            telemetry.PIECE_INDEX[piece.shape_type], piece.rotation, arg, piece.x, piece.y, value
+        )
+    
+    def move_piece(self, dx, dy=0):
+        """Move the current piece as a player action"""
+        if self.clearing_lines or self.game_over:
+            return False
+        if self.current_piece.move(dx, dy, self.grid):
+            self.emit(telemetry.MOVE)
+            return True
+        return False
+    
+    def shift_piece(self, dx):
+        """Move the current piece as far as it goes in direction dx; return the distance"""
+        if self.clearing_lines or self.game_over:
+            return 0
+        piece = self.current_piece
+        blocks = piece.shapes[piece.rotation]
+        distance = 0
+        while not collides(self.grid, piece.x + distance + dx, piece.y, blocks):
+            distance += dx
+        if distance and piece.move(distance, 0, self.grid):
+            self.emit(telemetry.MOVE)
+        return abs(distance)
+    
+    def rotate_piece(self, clockwise=True):
+        """Rotate the current piece as a player action"""
+        if self.clearing_lines or self.game_over:
+            return False
+        if self.current_piece.rotate(self.grid, clockwise):
+            self.emit(telemetry.ROTATE, arg=self.current_piece.last_kick)
+            return True
+        return False
+    
+    def hard_drop(self):
+        """Drop the current piece to the bottom and lock it"""
+        if self.clearing_lines or self.game_over:
+            return
+        drop_distance = self.current_piece.hard_drop(self.grid)
+        self.score += drop_distance * SCORE_HARD_DROP
+        if self.animated:
+            self.effects.drop_trail(self.current_piece.get_blocks(), drop_distance, self.current_piece.color)
+        self.emit(telemetry.DROP, value=drop_distance)
+        self.place_piece()
     
     def update(self, dt):
         """Update game state"""
+        if self.effects:
+            self.effects.update(dt)
+        
         if self.game_over:
             return True
         
+        self.play_time += dt
+        
         # Update piece appearance animation
         if self.current_piece:
             self.current_piece.update(dt)
@@ -201,20 +323,11 @@ class Game:
                 self.clear_lines()
             return False
         
-        # Handle continuous movement
-        self.move_timer += dt * 1000  # Convert to milliseconds
-        if self.move_timer >= KEY_REPEAT_INTERVAL:
-            self.move_timer = 0
-            if self.move_left:
-                self.current_piece.move(-1, 0, self.grid)
-            if self.move_right:
-                self.current_piece.move(1, 0, self.grid)
-        
         # Handle piece falling
         fall_speed = self.fall_speed
         if self.move_down:
             fall_speed *= SOFT_DROP_FACTOR
-            if self.current_piece.move(0, 1, self.grid):
+            if self.move_piece(0, 1):
                 self.score += SCORE_SOFT_DROP
         
         self.fall_timer += dt
@@ -225,77 +338,120 @@ class Game:
         
         return False
     
-    def draw(self):
-        """Draw the game state"""
-        # Draw background
-        pygame.draw.rect(
-            self.screen, 
-            GRID_COLOR, 
-            (
-                self.grid_offset_x - 1, 
-                self.grid_offset_y - 1, 
-                GRID_WIDTH * self.cell_size + 2, 
-                GRID_HEIGHT * self.cell_size + 2
-            )
-        )
-        
-        # Draw grid
-        for y in range(GRID_HEIGHT):
-            for x in range(GRID_WIDTH):
+    def view_top(self):
+        """First board row shown; tall boards scroll to follow the falling piece"""
+        hidden_rows = self.grid.height - self.visible_rows
+        if hidden_rows <= 0 or self.current_piece is None:
+            return max(0, hidden_rows)
+        return max(0, min(self.current_piece.y - self.visible_rows // 3, hidden_rows))
+    
+    @property
+    def animated(self):
+        """Whether particle effects are shown at the current quality tier"""
+        return self.effects and self.quality < QUALITY_NO_ANIMATIONS
+    
+    def empty_board(self, cell_size):
+        """Return the visible window of an empty board, rendered once per size"""
+        import pygame
+        
+        size = (self.grid.width * cell_size, self.visible_rows * cell_size)
+        cached = self.empty_board_cache.get(cell_size)
+        if cached is None or cached.get_size() != size:
+            cached = pygame.Surface(size)
+            cached.fill(BG_COLOR)
+            for y in range(self.visible_rows):
+                for x in range(self.grid.width):
+                    cell_rect = pygame.Rect(x * cell_size, y * cell_size, cell_size, cell_size)
+                    pygame.draw.rect(cached, GRID_COLOR, cell_rect, 1)
+            self.empty_board_cache[cell_size] = cached
+        return cached
+    
+    def draw_board(self, surface, offset_x, offset_y, cell_size, view_top):
+        """Draw the visible window of the board and the falling piece"""
+        import pygame
+        
+        width = self.grid.width
+        bevel = self.quality < QUALITY_NO_BEVELS
+        
+        # Rows being cleared flash white, then fade into the background
+        clearing = set(self.clearing_lines) if self.quality < QUALITY_NO_ANIMATIONS else ()
+        progress = self.clear_animation_timer / LINE_CLEAR_ANIMATION_DURATION
+        if progress > 0.7:
+            clear_target, clear_amount = WHITE, (progress - 0.7) / 0.3
+        else:
+            clear_target, clear_amount = BG_COLOR, 1 - progress / 0.7
+        
+        # Empty cells come from a pre-rendered grid; only the stack is drawn cell by cell
+        surface.blit(self.empty_board(cell_size), (offset_x, offset_y))
+        for y in range(max(view_top, self.grid.top), view_top + self.visible_rows):
+            row = self.grid[y]
+            row_clearing = y in clearing
+            for x, color in enumerate(row):
+                if not color:
+                    continue
                 cell_rect = pygame.Rect(
-                    self.grid_offset_x + x * self.cell_size,
-                    self.grid_offset_y + y * self.cell_size,
-                    self.cell_size, self.cell_size
+                    offset_x + x * cell_size,
+                    offset_y + (y - view_top) * cell_size,
+                    cell_size, cell_size
                 )
                 
-                # Draw placed blocks
-                if self.grid[y][x]:
-                    color = self.grid[y][x]
-                    
-                    # If this line is being cleared, animate it
-                    if y in self.clearing_lines:
-                        # Flash white and then fade out
-                        progress = self.clear_animation_timer / LINE_CLEAR_ANIMATION_DURATION
-                        if progress > 0.7:
-                            # Flash white
-                            flash_intensity = (progress - 0.7) / 0.3
-                            color = tuple(int(c + (255 - c) * flash_intensity) for c in color)
-                        else:
-                            # Fade out
-                            alpha = int(255 * progress / 0.7)
-                            pygame.draw.rect(self.screen, (*color, alpha), cell_rect)
-                            continue
-                    
-                    pygame.draw.rect(self.screen, color, cell_rect)
-                    
-                    # Draw a slightly darker border
-                    darker_color = tuple(max(0, c - 40) for c in color)
-                    pygame.draw.rect(self.screen, darker_color, cell_rect, 1)
-                    
-                    # Add a highlight on top/left edges
-                    lighter_color = tuple(min(255, c + 40) for c in color)
-                    pygame.draw.line(self.screen, lighter_color, 
-                                    (cell_rect.left + 1, cell_rect.top + 1), 
-                                    (cell_rect.right - 2, cell_rect.top + 1))
-                    pygame.draw.line(self.screen, lighter_color, 
-                                    (cell_rect.left + 1, cell_rect.top + 1), 
-                                    (cell_rect.left + 1, cell_rect.bottom - 2))
-                else:
-                    # Draw empty cell
-                    pygame.draw.rect(self.screen, BG_COLOR, cell_rect)
-                    pygame.draw.rect(self.screen, GRID_COLOR, cell_rect, 1)
-        
-        # Draw current piece
+                # If this line is being cleared, animate it
+                if row_clearing:
+                    color = tuple(int(c + (t - c) * clear_amount) for c, t in zip(color, clear_target))
+                    surface.fill(color, cell_rect)
+                    continue
+                
+                draw_block(surface, color, cell_rect, bevel)
+        
+        # Draw current piece, clipped to the visible window
         if self.current_piece and not self.clearing_lines:
-            self.current_piece.draw(
-                self.screen, 
-                self.grid_offset_x, 
-                self.grid_offset_y, 
+            previous_clip = surface.get_clip()
+            surface.set_clip(pygame.Rect(offset_x, offset_y, width * cell_size, self.visible_rows * cell_size))
+            self.current_piece.draw(surface, offset_x, offset_y - view_top * cell_size, cell_size, self.quality)
+            surface.set_clip(previous_clip)
+    
+    def draw(self):
+        """Draw the game state"""
+        import pygame
+        
+        width = self.grid.width
+        view_top = self.view_top()
+        board_rect = pygame.Rect(
+            self.grid_offset_x - 1, 
+            self.grid_offset_y - 1, 
+            width * self.cell_size + 2, 
+            self.visible_rows * self.cell_size + 2
+        )
+        
+        # Draw background
+        pygame.draw.rect(self.screen, GRID_COLOR, board_rect)
+        
+        if self.quality >= QUALITY_LOW_RESOLUTION:
+            # Draw the board with smaller cells into an offscreen surface and scale it up
+            cell_size = max(1, int(self.cell_size * QUALITY_LOW_RESOLUTION_SCALE))
+            low_size = (width * cell_size, self.visible_rows * cell_size)
+            full_size = (width * self.cell_size, self.visible_rows * self.cell_size)
+            if self.low_resolution_board is None or self.low_resolution_board.get_size() != low_size:
+                self.low_resolution_board = pygame.Surface(low_size)
+            if self.scaled_board is None or self.scaled_board.get_size() != full_size:
+                self.scaled_board = pygame.Surface(full_size)
+            self.draw_board(self.low_resolution_board, 0, 0, cell_size, view_top)
+            pygame.transform.scale(self.low_resolution_board, full_size, self.scaled_board)
+            self.screen.blit(self.scaled_board, (self.grid_offset_x, self.grid_offset_y))
+        else:
+            self.draw_board(self.screen, self.grid_offset_x, self.grid_offset_y, self.cell_size, view_top)
+        
+        # Draw particle effects over the board
+        if self.animated:
+            self.effects.draw(
+                self.screen,
+                self.grid_offset_x,
+                self.grid_offset_y - view_top * self.cell_size,
                 self.cell_size
             )
         
         # Draw sidebar
-        sidebar_x = self.grid_offset_x + GRID_WIDTH * self.cell_size + 20
+        sidebar_x = self.grid_offset_x + width * self.cell_size + 20
         sidebar_width = 180
         
         # Draw next piece preview
@@ -332,20 +488,7 @@ class Game:
                     offset_y + y * self.cell_size,
                     self.cell_size, self.cell_size
                 )
-                pygame.draw.rect(self.screen, self.next_piece.color, block_rect)
-                
-                # Draw a slightly darker border
-                darker_color = tuple(max(0, c - 40) for c in self.next_piece.color)
-                pygame.draw.rect(self.screen, darker_color, block_rect, 1)
-                
-                # Add a highlight on top/left edges
-                lighter_color = tuple(min(255, c + 40) for c in self.next_piece.color)
-                pygame.draw.line(self.screen, lighter_color, 
-                                (block_rect.left + 1, block_rect.top + 1), 
-                                (block_rect.right - 2, block_rect.top + 1))
-                pygame.draw.line(self.screen, lighter_color, 
-                                (block_rect.left + 1, block_rect.top + 1), 
-                                (block_rect.left + 1, block_rect.bottom - 2))
+                draw_block(self.screen, self.next_piece.color, block_rect, self.quality < QUALITY_NO_BEVELS)
         
         # Draw score
         score_y = self.grid_offset_y + 160
@@ -397,43 +540,64 @@ class Game:
             control_text = self.font.render(control, True, GRAY)
             self.screen.blit(control_text, (sidebar_x, controls_y + 30 + i * 25))
     
-    def reset(self):
+    def reset(self, seed=None):
         """Reset the game state"""
-        self.grid = [[None for _ in range(GRID_WIDTH)] for _ in range(GRID_HEIGHT)]
+        self.seed = random.randrange(2 ** 32) if seed is None else seed
+        self.rng = random.Random(self.seed)
+        self.high_score = max(self.high_score, self.load_high_score())
+        self.grid = Board(self.grid.width, self.grid.height)
         self.score = 0
         self.level = 1
         self.lines_cleared = 0
         self.game_over = False
+        self.play_time = 0
+        self.score_recorded = False
+        self.piece_spawn_time = 0
         self.clearing_lines = []
         self.clear_animation_timer = 0
-        self.move_left = False
-        self.move_right = False
+        if self.effects:
+            self.effects.clear()
         self.move_down = False
-        self.move_timer = 0
         self.fall_timer = 0
         self.fall_speed = INITIAL_FALL_SPEED
         
+        if self.telemetry:
+            self.telemetry_game = self.telemetry.begin_game(self.seed)
+        
         # Refill the bag and spawn new pieces
+        self.current_piece = None
+        self.next_piece = None
         self.tetrimino_bag = []
         self.refill_bag()
         self.spawn_piece()
         self.next_piece = self.get_next_tetrimino()
     
+    @property
+    def mode(self):
+        """Name of the leaderboard table this game is ranked in"""
+        return "zen" if self.zen_mode else "marathon"
+    
     def load_high_score(self):
-        """Load high score from file"""
-        try:
-            if os.path.exists(HIGH_SCORE_FILE):
-                with open(HIGH_SCORE_FILE, 'r') as f:
-                    return int(f.read().strip())
-        except:
-            pass
-        return 0
+        """Best score of this profile and mode, as cached by the leaderboard"""
+        if self.leaderboard is None:
+            return 0
+        return self.leaderboard.best_score(self.mode, self.profile)
     
     def save_high_score(self):
-        """Save high score to file"""
-        if self.score > self.high_score:
-            try:
-                with open(HIGH_SCORE_FILE, 'w') as f:
-                    f.write(str(self.score))
-            except:
-                pass
\ No newline at end of file
+        """Queue this game's result on the leaderboard (written in the background)"""
+        if self.leaderboard is None or self.score_recorded or self.score <= 0:
+            return
+        # Only games with a leaderboard pay for importing it (and sqlite3)
+        from leaderboard import make_record
+        
+        self.leaderboard.submit(make_record(
+            score=self.score,
+            lines=self.lines_cleared,
+            level=self.level,
+            duration=self.play_time,
+            seed=self.seed,
+            profile=self.profile,
+            mode=self.mode
+        ))
+        self.score_recorded = True
+        self.high_score = max(self.high_score, self.score)
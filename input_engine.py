@@ -0,0 +1,242 @@
+"""Timestamped keyboard input with DAS/ARR auto-shift.
+
+Events are stamped with time.perf_counter() as they arrive: wait() sleeps
+until the next frame in INPUT_POLL_MS slices and polls the event queue in
+between, so a stamp is within a slice of the key press instead of rounded
+to the frame that handles it. apply() replays the queued gameplay inputs in
+stamp order at the start of the simulation step, interleaved with the
+auto-shift moves that fell due between them:
+
+    DAS (KEY_REPEAT_DELAY)     how long left/right is held before repeating
+    ARR (KEY_REPEAT_INTERVAL)  time between repeats; 0 sends the piece
+                               straight to the wall (Game.shift_piece)
+
+Repeats are scheduled from the press stamp rather than counted in whole
+frames, so several can land in one step and none is delayed to the next.
+The time from an input's stamp (or a repeat's due time) to the step that
+applies it is kept as the input latency; stats() reports its mean, jitter
+(standard deviation) and worst case over the last INPUT_METRICS_WINDOW;
+the game prints them when it exits.
+
+Usage: python input_engine.py bench [--das MS] [--arr MS] [--seconds S]
+"""
+import argparse
+import os
+import random
+import statistics
+import threading
+import time
+from collections import deque
+from functools import lru_cache
+import replay
+from constants import (
+    SCREEN_WIDTH, SCREEN_HEIGHT, FRAME_RATE,
+    KEY_REPEAT_DELAY, KEY_REPEAT_INTERVAL, INPUT_POLL_MS, INPUT_METRICS_WINDOW
+)
+
+# Direction of the shift actions
+SHIFTS = {replay.LEFT: -1, replay.RIGHT: 1}
+
+
+@lru_cache(maxsize=1)
+def key_actions():
+    """Return {pygame key: replay action} for the gameplay keys"""
+    import pygame
+
+    return {
+        pygame.K_LEFT: replay.LEFT,
+        pygame.K_RIGHT: replay.RIGHT,
+        pygame.K_UP: replay.ROTATE_CW,
+        pygame.K_z: replay.ROTATE_CCW,
+        pygame.K_SPACE: replay.HARD_DROP,
+        pygame.K_DOWN: replay.SOFT_DROP_ON
+    }
+
+
+class InputEngine:
+    """Queue of stamped gameplay inputs and the held left/right key's auto-shift"""
+
+    def __init__(self, das=KEY_REPEAT_DELAY, arr=KEY_REPEAT_INTERVAL, clock=time.perf_counter):
+        self.das = das / 1000
+        self.arr = arr / 1000
+        self.clock = clock
+        self.events = []
+        self.latencies = deque(maxlen=INPUT_METRICS_WINDOW)
+        self.reset()
+
+    def reset(self):
+        """Forget queued inputs and held keys, e.g. when play starts or resumes"""
+        self.pending = []      # (stamp, action, pressed)
+        self.held = []         # Held shift directions, most recent last
+        self.shift_due = None  # When the held direction shifts next
+        self.charged = False   # Whether DAS ran out with ARR 0
+
+    def poll(self):
+        """Stamp and keep the events waiting in the pygame queue"""
+        import pygame
+
+        events = pygame.event.get()
+        if events:
+            now = self.clock()
+            self.events.extend((now, event) for event in events)
+
+    def wait(self, deadline):
+        """Sleep until `deadline` (a clock time), polling events every INPUT_POLL_MS"""
+        self.poll()
+        while True:
+            remaining = deadline - self.clock()
+            if remaining <= 0:
+                return
+            time.sleep(min(remaining, INPUT_POLL_MS / 1000))
+            self.poll()
+
+    def drain(self):
+        """Return the (stamp, event) pairs polled so far and clear them"""
+        events, self.events = self.events, []
+        return events
+
+    def press(self, key, stamp):
+        """Queue a key press; return False if the key is not a gameplay key"""
+        action = key_actions().get(key)
+        if action is None:
+            return False
+        self.pending.append((stamp, action, True))
+        return True
+
+    def release(self, key, stamp):
+        """Queue a key release; only shifts and soft drop care"""
+        action = key_actions().get(key)
+        if action in SHIFTS or action == replay.SOFT_DROP_ON:
+            self.pending.append((stamp, action, False))
+
+    def apply(self, game, now=None):
+        """Apply the queued inputs and the auto-shifts due up to now, in time order"""
+        if now is None:
+            now = self.clock()
+        pending, self.pending = self.pending, []
+        for stamp, action, pressed in pending:
+            self.auto_shift(game, stamp, now)
+            self.latencies.append(now - stamp)
+            if action in SHIFTS:
+                self.shift(game, SHIFTS[action], pressed, stamp)
+            elif action == replay.SOFT_DROP_ON and not pressed:
+                replay.apply_action(game, replay.SOFT_DROP_OFF)
+            else:
+                replay.apply_action(game, action)
+        self.auto_shift(game, now, now)
+
+    def shift(self, game, direction, pressed, stamp):
+        """Track a left/right press or release; a press moves one cell at once"""
+        if direction in self.held:
+            self.held.remove(direction)
+        if pressed:
+            self.held.append(direction)
+            game.move_piece(direction)
+        elif not self.held:
+            self.shift_due = None
+            return
+        # The newest held direction charges from this input on
+        self.shift_due = stamp + self.das
+        self.charged = False
+
+    def auto_shift(self, game, until, now):
+        """Apply the held direction's repeats due up to `until`"""
+        if not self.held or self.shift_due > until:
+            return
+        direction = self.held[-1]
+        if self.arr == 0:
+            # Instant travel: keep the piece (and the next ones) against the wall
+            game.shift_piece(direction)
+            if not self.charged:
+                self.charged = True
+                self.latencies.append(now - self.shift_due)
+            return
+
+        due = self.shift_due
+        repeats = int((until - due) / self.arr) + 1
+        for _ in range(repeats):
+            if not game.move_piece(direction):
+                break
+            self.latencies.append(now - due)
+            due += self.arr
+        self.shift_due += repeats * self.arr
+
+    def stats(self):
+        """Return input latency metrics in ms: inputs, mean, jitter and max"""
+        latencies = [latency * 1000 for latency in self.latencies]
+        if not latencies:
+            return {"inputs": 0, "mean_ms": 0.0, "jitter_ms": 0.0, "max_ms": 0.0}
+        return {
+            "inputs": len(latencies),
+            "mean_ms": statistics.fmean(latencies),
+            "jitter_ms": statistics.pstdev(latencies),
+            "max_ms": max(latencies)
+        }
+
+    def summary(self):
+        """Return the latency metrics as one line of text"""
+        stats = self.stats()
+        return (f"DAS {self.das * 1000:g} ms, ARR {self.arr * 1000:g} ms: {stats['inputs']} inputs, "
+                f"latency mean {stats['mean_ms']:.2f} ms, jitter {stats['jitter_ms']:.2f} ms, "
+                f"max {stats['max_ms']:.2f} ms (frame {1000 / FRAME_RATE:.1f} ms)")
+
+
+def bench(das, arr, seconds):
+    """Run the frame loop while another thread types, and report the latency metrics"""
+    os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+    import pygame
+    from game import Game
+
+    pygame.init()
+    pygame.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT))
+    game = Game(None, None, seed=0)
+    engine = InputEngine(das, arr)
+    stop = threading.Event()
+
+    def typist():
+        # Taps and holds at random times, unrelated to the frame boundaries
+        rng = random.Random(0)
+        keys = (pygame.K_LEFT, pygame.K_RIGHT, pygame.K_UP, pygame.K_z)
+        while not stop.is_set():
+            key = rng.choice(keys)
+            pygame.event.post(pygame.event.Event(pygame.KEYDOWN, key=key))
+            time.sleep(rng.uniform(0.01, 0.4))
+            pygame.event.post(pygame.event.Event(pygame.KEYUP, key=key))
+            time.sleep(rng.uniform(0.01, 0.1))
+
+    thread = threading.Thread(target=typist, daemon=True)
+    thread.start()
+    frame_start = time.perf_counter()
+    end = frame_start + seconds
+    while frame_start < end:
+        engine.wait(frame_start + 1 / FRAME_RATE)
+        now = time.perf_counter()
+        dt, frame_start = now - frame_start, now
+        for stamp, event in engine.drain():
+            if event.type == pygame.KEYDOWN:
+                engine.press(event.key, stamp)
+            elif event.type == pygame.KEYUP:
+                engine.release(event.key, stamp)
+        engine.apply(game, now)
+        if game.update(dt):
+            game.reset(0)
+    stop.set()
+    thread.join()
+    pygame.quit()
+
+    print(engine.summary())
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    commands = parser.add_subparsers(dest="command", required=True)
+    bench_parser = commands.add_parser("bench", help="measure input latency under synthetic typing")
+    bench_parser.add_argument("--das", type=float, default=KEY_REPEAT_DELAY)
+    bench_parser.add_argument("--arr", type=float, default=KEY_REPEAT_INTERVAL)
+    bench_parser.add_argument("--seconds", type=float, default=10)
+    args = parser.parse_args()
+    bench(args.das, args.arr, args.seconds)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,240 @@
+import os
+import queue
+import sqlite3
+import sys
+import threading
+import time
+from constants import (
+    LEADERBOARD_FILE, LEADERBOARD_SIZE, HIGH_SCORE_FILE,
+    LEADERBOARD_RETRY_DELAY, LEADERBOARD_RETRY_MAX_DELAY, LEADERBOARD_CLOSE_TIMEOUT
+)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS scores (
+    id INTEGER PRIMARY KEY,
+    profile TEXT NOT NULL,
+    mode TEXT NOT NULL,
+    score INTEGER NOT NULL,
+    lines INTEGER NOT NULL,
+    level INTEGER NOT NULL,
+    duration REAL NOT NULL,
+    seed INTEGER,
+    date REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS scores_mode_score ON scores (mode, score DESC);
+CREATE INDEX IF NOT EXISTS scores_profile_mode_score ON scores (profile, mode, score DESC);
+"""
+
+COLUMNS = ("profile", "mode", "score", "lines", "level", "duration", "seed", "date")
+
+# Sentinel telling the writer thread to flush and exit
+_STOP = object()
+
+
+class Leaderboard:
+    """Top-N score tables stored in SQLite with write-behind persistence.
+
+    submit() only enqueues the record, a background thread writes queued
+    records in a single transaction so the frame loop never waits on disk.
+    Every flush is atomic and WAL mode lets several game instances share
+    the same file.
+    """
+
+    def __init__(self, path=LEADERBOARD_FILE, size=LEADERBOARD_SIZE):
+        self.path = path
+        self.size = size
+        self._queue = queue.Queue()
+        # Records submitted but not yet committed, guarded by the condition
+        self._pending = 0
+        self._written = threading.Condition()
+        self.dropped = []  # Records given up on at close(), also reported on stderr
+
+        self._read_conn = self._connect()
+        with self._read_conn:
+            self._read_conn.executescript(SCHEMA)
+        self._import_legacy_high_score()
+        # Best score of each (profile, mode) table, kept current by the writer
+        # thread so the frame loop can read it without a query
+        self._best = {
+            (profile, mode): score
+            for profile, mode, score in self._read_conn.execute(
+                "SELECT profile, mode, MAX(score) FROM scores GROUP BY profile, mode"
+            )
+        }
+
+        self._writer = threading.Thread(target=self._run, name="leaderboard-writer", daemon=True)
+        self._writer.start()
+
+    def _connect(self):
+        """Open a connection configured for concurrent access"""
+        conn = sqlite3.connect(self.path, timeout=5.0, check_same_thread=False)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
+
+    def _import_legacy_high_score(self):
+        """Carry over the single score from the old high score file"""
+        if not os.path.exists(HIGH_SCORE_FILE):
+            return
+        if self._read_conn.execute("SELECT 1 FROM scores LIMIT 1").fetchone():
+            return
+        try:
+            with open(HIGH_SCORE_FILE, 'r') as f:
+                score = int(f.read().strip())
+        except (OSError, ValueError):
+            return
+        if score > 0:
+            with self._read_conn:
+                self._insert(self._read_conn, [make_record(score=score, date=os.path.getmtime(HIGH_SCORE_FILE))])
+
+    def submit(self, record):
+        """Queue a score record for writing; never blocks"""
+        with self._written:
+            self._pending += 1
+        self._queue.put(record)
+
+    def flush(self, timeout=None):
+        """Wait until every queued record has been written; False on timeout"""
+        with self._written:
+            return self._written.wait_for(lambda: self._pending == 0, timeout)
+
+    def close(self):
+        """Flush pending records and stop the writer thread.
+
+        Records the database keeps refusing are retried for up to
+        LEADERBOARD_CLOSE_TIMEOUT seconds, then reported on stderr and kept
+        in `dropped`.
+        """
+        self._queue.put(_STOP)
+        self._writer.join()
+        self._read_conn.close()
+
+    def _run(self):
+        """Writer thread: drain the queue in batches, one transaction each"""
+        conn = self._connect()
+        running = True
+        while running:
+            batch = []
+            running = self._take_queued(batch, wait=True)
+            delay = LEADERBOARD_RETRY_DELAY
+            deadline = None
+            while batch:
+                tables = {(r["profile"], r["mode"]) for r in batch}
+                try:
+                    with conn:
+                        self._insert(conn, batch)
+                        self._prune(conn, tables)
+                        best = self._best_scores(conn, tables)
+                except sqlite3.Error as error:
+                    # The transaction rolled back (the file is locked by another
+                    # instance, the disk is full...): keep the batch and retry it,
+                    # along with anything submitted meanwhile, until it commits
+                    if not running:
+                        if deadline is None:
+                            deadline = time.monotonic() + LEADERBOARD_CLOSE_TIMEOUT
+                        elif time.monotonic() >= deadline:
+                            self._drop(batch, error)
+                            break
+                    time.sleep(delay)
+                    delay = min(delay * 2, LEADERBOARD_RETRY_MAX_DELAY)
+                    running = self._take_queued(batch) and running
+                    continue
+
+                self._best.update(best)
+                self._written_batch(batch)
+                break
+        conn.close()
+
+    def _take_queued(self, batch, wait=False):
+        """Move the queued records into batch, waiting for one if asked; return False once stopped"""
+        running = True
+        while True:
+            try:
+                record = self._queue.get(block=wait)
+            except queue.Empty:
+                return running
+            wait = False
+            if record is _STOP:
+                running = False
+            else:
+                batch.append(record)
+
+    def _written_batch(self, records):
+        """Mark records as no longer pending and wake up flush() once none are"""
+        with self._written:
+            self._pending -= len(records)
+            if not self._pending:
+                self._written.notify_all()
+
+    def _drop(self, records, error):
+        """Give up on records the database kept refusing while closing"""
+        self.dropped.extend(records)
+        print(f"leaderboard: could not save {len(records)} score(s) to {self.path} ({error}):", file=sys.stderr)
+        for record in records:
+            print(f"  {record}", file=sys.stderr)
+        self._written_batch(records)
+
+    def _insert(self, conn, records):
+        conn.executemany(
+            f"INSERT INTO scores ({', '.join(COLUMNS)}) VALUES ({', '.join('?' * len(COLUMNS))})",
+            [tuple(record[column] for column in COLUMNS) for record in records]
+        )
+
+    def _prune(self, conn, tables):
+        """Keep only the best `size` scores of each (profile, mode) table"""
+        for profile, mode in tables:
+            conn.execute(
+                "DELETE FROM scores WHERE profile = ? AND mode = ? AND id NOT IN "
+                "(SELECT id FROM scores WHERE profile = ? AND mode = ? ORDER BY score DESC, date LIMIT ?)",
+                (profile, mode, profile, mode, self.size)
+            )
+
+    def top(self, mode=None, profile=None, limit=None):
+        """Return the best scores as dicts, optionally filtered by mode and profile"""
+        clauses = []
+        params = []
+        if profile is not None:
+            clauses.append("profile = ?")
+            params.append(profile)
+        if mode is not None:
+            clauses.append("mode = ?")
+            params.append(mode)
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+        params.append(limit or self.size)
+        rows = self._read_conn.execute(
+            f"SELECT {', '.join(COLUMNS)} FROM scores {where} ORDER BY score DESC, date LIMIT ?",
+            params
+        ).fetchall()
+        return [dict(zip(COLUMNS, row)) for row in rows]
+
+    def _best_scores(self, conn, tables):
+        """Return {(profile, mode): best score} for the given tables"""
+        return {
+            (profile, mode): conn.execute(
+                "SELECT MAX(score) FROM scores WHERE profile = ? AND mode = ?", (profile, mode)
+            ).fetchone()[0] or 0
+            for profile, mode in tables
+        }
+
+    def best_score(self, mode, profile="default"):
+        """Return the cached best score of one table, without touching the database"""
+        return self._best.get((profile, mode), 0)
+
+    def high_score(self, mode=None, profile=None):
+        """Return the best score for the given filters, or 0"""
+        best = self.top(mode, profile, limit=1)
+        return best[0]["score"] if best else 0
+
+
+def make_record(score, lines=0, level=1, duration=0.0, seed=None, profile="default", mode="marathon", date=None):
+    """Build a score record for Leaderboard.submit"""
+    return {
+        "profile": profile,
+        "mode": mode,
+        "score": score,
+        "lines": lines,
+        "level": level,
+        "duration": duration,
+        "seed": seed,
+        "date": time.time() if date is None else date
+    }
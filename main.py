@@ -1,41 +1,7 @@
-import pygame
-import sys
+import gc
 import os
-from game import Game
-from menu import Menu
-from constants import *
-
-# Initialize pygame
-pygame.init()
-pygame.mixer.init()
-
-# Set up the display
-screen = pygame.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT), pygame.RESIZABLE)
-pygame.display.set_caption("Tetris")
-
-# Load fonts
-try:
-    font_path = os.path.join('assets', 'fonts', 'Roboto-Regular.ttf')
-    main_font = pygame.font.Font(font_path, 24)
-    title_font = pygame.font.Font(font_path, 48)
-except:
-    main_font = pygame.font.SysFont('Arial', 24)
-    title_font = pygame.font.SysFont('Arial', 48)
-
-# Load sounds
-try:
-    place_sound = pygame.mixer.Sound(os.path.join('assets', 'sounds', 'place.wav'))
-    line_clear_sound = pygame.mixer.Sound(os.path.join('assets', 'sounds', 'line_clear.wav'))
-    game_over_sound = pygame.mixer.Sound(os.path.join('assets', 'sounds', 'game_over.wav'))
-except:
-    # Create silent sounds if files not found
-    place_sound = pygame.mixer.Sound(buffer=bytearray(100))
-    line_clear_sound = pygame.mixer.Sound(buffer=bytearray(100))
-    game_over_sound = pygame.mixer.Sound(buffer=bytearray(100))
-
-# Create game and menu instances
-game = Game(screen, main_font, place_sound, line_clear_sound, game_over_sound)
-menu = Menu(screen, title_font, main_font)
+import time
+from constants import SCREEN_WIDTH, SCREEN_HEIGHT, BG_COLOR, WHITE, TELEMETRY_FILE, QUALITY_TIER, FRAME_RATE
 
 # Game states
 MENU = 0
@@ -43,114 +9,230 @@ PLAYING = 1
 GAME_OVER = 2
 PAUSED = 3
 
-current_state = MENU
 
-# Main game loop
-clock = pygame.time.Clock()
-running = True
+def load_fonts():
+    """Load the main and title fonts, falling back to a system font"""
+    import pygame
+    
+    try:
+        font_path = os.path.join('assets', 'fonts', 'Roboto-Regular.ttf')
+        main_font = pygame.font.Font(font_path, 24)
+        title_font = pygame.font.Font(font_path, 48)
+    except (OSError, pygame.error):
+        main_font = pygame.font.SysFont('Arial', 24)
+        title_font = pygame.font.SysFont('Arial', 48)
+    return main_font, title_font
+
+
+def load_sounds():
+    """Load the game sounds, falling back to silent buffers"""
+    import pygame
+    
+    try:
+        place_sound = pygame.mixer.Sound(os.path.join('assets', 'sounds', 'place.wav'))
+        line_clear_sound = pygame.mixer.Sound(os.path.join('assets', 'sounds', 'line_clear.wav'))
+        game_over_sound = pygame.mixer.Sound(os.path.join('assets', 'sounds', 'game_over.wav'))
+    except (OSError, pygame.error):
+        # Create silent sounds if files not found
+        place_sound = pygame.mixer.Sound(buffer=bytearray(100))
+        line_clear_sound = pygame.mixer.Sound(buffer=bytearray(100))
+        game_over_sound = pygame.mixer.Sound(buffer=bytearray(100))
+    return place_sound, line_clear_sound, game_over_sound
+
 
-while running:
-    dt = clock.tick(60) / 1000.0  # Delta time in seconds
+def main():
+    """Run the game until the window is closed"""
+    import pygame
+    from game import Game
+    from menu import Menu
+    from leaderboard import Leaderboard
+    from battle_view import BattleView
+    from quality import QualityGovernor
+    from render_target import RenderTarget
+    from input_engine import InputEngine
     
-    # Handle events
-    for event in pygame.event.get():
-        if event.type == pygame.QUIT:
-            running = False
+    # Initialize pygame
+    pygame.init()
+    pygame.mixer.init()
+    
+    # Set up the display; everything is drawn into the render target's canvas
+    window = pygame.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT), pygame.RESIZABLE)
+    pygame.display.set_caption("Tetris")
+    target = RenderTarget(window)
+    screen = target.canvas
+    
+    main_font, title_font = load_fonts()
+    place_sound, line_clear_sound, game_over_sound = load_sounds()
+    
+    # Create game and menu instances
+    leaderboard = Leaderboard()
+    telemetry_log = None
+    if TELEMETRY_FILE:
+        from telemetry import TelemetryWriter
+        telemetry_log = TelemetryWriter(TELEMETRY_FILE)
+    game = Game(screen, main_font, place_sound, line_clear_sound, game_over_sound,
+                leaderboard=leaderboard, telemetry_log=telemetry_log)
+    menu = Menu(screen, title_font, main_font)
+    battle = BattleView(game)
+    quality = QualityGovernor()
+    inputs = InputEngine()
+    game.quality = quality.tier if QUALITY_TIER is None else QUALITY_TIER
+    
+    def relayout(canvas):
+        """Lay the views out again on a canvas of a new size"""
+        game.resize(canvas)
+        battle.resize(canvas)
+        menu.resize(canvas)
+    
+    target.on_layout = relayout
+    
+    # The game or the battle view around it, whichever is being played
+    view = game
+    current_state = MENU
+    
+    # Keep everything loaded so far out of the garbage collector's full
+    # passes, which otherwise stall frames that allocate a lot (effects)
+    gc.freeze()
+    
+    # Main game loop
+    frame_start = time.perf_counter()
+    running = True
+
+    while running:
+        # Wait for the next frame, stamping input events as they arrive
+        busy_ms = (time.perf_counter() - frame_start) * 1000
+        inputs.wait(frame_start + 1 / FRAME_RATE)
+        now = time.perf_counter()
+        dt = now - frame_start  # Delta time in seconds
+        frame_start = now
         
-        elif event.type == pygame.VIDEORESIZE:
-            screen = pygame.display.set_mode((event.w, event.h), pygame.RESIZABLE)
-            game.resize(screen)
-            menu.resize(screen)
+        # Adapt the rendering quality to the time the last frame took
+        if QUALITY_TIER is None and quality.record(busy_ms):
+            game.quality = quality.tier
         
-        elif event.type == pygame.KEYDOWN:
-            if current_state == MENU:
-                if event.key == pygame.K_RETURN:
-                    current_state = PLAYING
-                    game.reset()
+        # Handle events
+        for stamp, event in inputs.drain():
+            if event.type == pygame.QUIT:
+                running = False
             
-            elif current_state == PLAYING:
-                if event.key == pygame.K_p:
-                    current_state = PAUSED
-                else:
-                    game.handle_key_down(event.key)
+            elif event.type == pygame.VIDEORESIZE:
+                # Coalesced: the layout is rebuilt once the user stops dragging
+                target.request_resize((event.w, event.h))
             
-            elif current_state == PAUSED:
-                if event.key == pygame.K_p:
-                    current_state = PLAYING
-                elif event.key == pygame.K_ESCAPE:
-                    current_state = MENU
+            elif event.type == pygame.KEYDOWN:
+                if current_state == MENU:
+                    if event.key == pygame.K_RETURN:
+                        current_state = PLAYING
+                        view = game
+                        view.reset()
+                        inputs.reset()
+                
+                elif current_state == PLAYING:
+                    if event.key == pygame.K_p:
+                        current_state = PAUSED
+                    else:
+                        inputs.press(event.key, stamp)
+                
+                elif current_state == PAUSED:
+                    if event.key == pygame.K_p:
+                        current_state = PLAYING
+                        inputs.reset()
+                    elif event.key == pygame.K_ESCAPE:
+                        current_state = MENU
+                
+                elif current_state == GAME_OVER:
+                    if event.key == pygame.K_RETURN:
+                        current_state = PLAYING
+                        view.reset()
+                        inputs.reset()
+                    elif event.key == pygame.K_ESCAPE:
+                        current_state = MENU
             
-            elif current_state == GAME_OVER:
-                if event.key == pygame.K_RETURN:
+            elif event.type == pygame.KEYUP and current_state == PLAYING:
+                inputs.release(event.key, stamp)
+            
+            elif event.type == pygame.MOUSEBUTTONDOWN and current_state == MENU:
+                action = menu.handle_click(target.to_canvas(event.pos))
+                if action == "play":
+                    current_state = PLAYING
+                    view = game
+                    view.reset()
+                    inputs.reset()
+                elif action == "battle":
                     current_state = PLAYING
-                    game.reset()
-                elif event.key == pygame.K_ESCAPE:
-                    current_state = MENU
+                    view = battle
+                    view.reset()
+                    inputs.reset()
+                elif action == "quit":
+                    running = False
         
-        elif event.type == pygame.KEYUP and current_state == PLAYING:
-            game.handle_key_up(event.key)
+        # Update and render based on current state
+        screen = target.canvas
+        screen.fill(BG_COLOR)
         
-        elif event.type == pygame.MOUSEBUTTONDOWN and current_state == MENU:
-            action = menu.handle_click(pygame.mouse.get_pos())
-            if action == "play":
-                current_state = PLAYING
-                game.reset()
-            elif action == "quit":
-                running = False
-    
-    # Update and render based on current state
-    screen.fill(BG_COLOR)
-    
-    if current_state == MENU:
-        menu.update()
-        menu.draw()
-    
-    elif current_state == PLAYING:
-        game_over = game.update(dt)
-        if game_over:
-            current_state = GAME_OVER
-            game_over_sound.play()
-        game.draw()
-    
-    elif current_state == PAUSED:
-        game.draw()
-        # Draw pause overlay
-        overlay = pygame.Surface((screen.get_width(), screen.get_height()), pygame.SRCALPHA)
-        overlay.fill((0, 0, 0, 128))
-        screen.blit(overlay, (0, 0))
+        if current_state == MENU:
+            menu.update(dt, target.to_canvas(pygame.mouse.get_pos()))
+            menu.draw()
         
-        pause_text = title_font.render("PAUSED", True, WHITE)
-        pause_rect = pause_text.get_rect(center=(screen.get_width() // 2, screen.get_height() // 2))
-        screen.blit(pause_text, pause_rect)
+        elif current_state == PLAYING:
+            # Inputs and auto-shifts since the last frame, in the order they happened
+            inputs.apply(game, now)
+            game_over = view.update(dt)
+            if game_over:
+                current_state = GAME_OVER
+                game_over_sound.play()
+                game.save_high_score()
+            view.draw()
         
-        resume_text = main_font.render("Press P to resume or ESC for menu", True, WHITE)
-        resume_rect = resume_text.get_rect(center=(screen.get_width() // 2, screen.get_height() // 2 + 60))
-        screen.blit(resume_text, resume_rect)
-    
-    elif current_state == GAME_OVER:
-        game.draw()
-        # Draw game over overlay
-        overlay = pygame.Surface((screen.get_width(), screen.get_height()), pygame.SRCALPHA)
-        overlay.fill((0, 0, 0, 128))
-        screen.blit(overlay, (0, 0))
-        
-        game_over_text = title_font.render("GAME OVER", True, WHITE)
-        game_over_rect = game_over_text.get_rect(center=(screen.get_width() // 2, screen.get_height() // 2))
-        screen.blit(game_over_text, game_over_rect)
+        elif current_state == PAUSED:
+            view.draw()
+            # Draw pause overlay
+            overlay = pygame.Surface((screen.get_width(), screen.get_height()), pygame.SRCALPHA)
+            overlay.fill((0, 0, 0, 128))
+            screen.blit(overlay, (0, 0))
+            
+            pause_text = title_font.render("PAUSED", True, WHITE)
+            pause_rect = pause_text.get_rect(center=(screen.get_width() // 2, screen.get_height() // 2))
+            screen.blit(pause_text, pause_rect)
+            
+            resume_text = main_font.render("Press P to resume or ESC for menu", True, WHITE)
+            resume_rect = resume_text.get_rect(center=(screen.get_width() // 2, screen.get_height() // 2 + 60))
+            screen.blit(resume_text, resume_rect)
         
-        score_text = main_font.render(f"Score: {game.score}", True, WHITE)
-        score_rect = score_text.get_rect(center=(screen.get_width() // 2, screen.get_height() // 2 + 60))
-        screen.blit(score_text, score_rect)
+        elif current_state == GAME_OVER:
+            view.draw()
+            # Draw game over overlay
+            overlay = pygame.Surface((screen.get_width(), screen.get_height()), pygame.SRCALPHA)
+            overlay.fill((0, 0, 0, 128))
+            screen.blit(overlay, (0, 0))
+            
+            game_over_text = title_font.render("GAME OVER", True, WHITE)
+            game_over_rect = game_over_text.get_rect(center=(screen.get_width() // 2, screen.get_height() // 2))
+            screen.blit(game_over_text, game_over_rect)
+            
+            score_text = main_font.render(f"Score: {game.score}", True, WHITE)
+            score_rect = score_text.get_rect(center=(screen.get_width() // 2, screen.get_height() // 2 + 60))
+            screen.blit(score_text, score_rect)
+            
+            restart_text = main_font.render("Press ENTER to restart or ESC for menu", True, WHITE)
+            restart_rect = restart_text.get_rect(center=(screen.get_width() // 2, screen.get_height() // 2 + 100))
+            screen.blit(restart_text, restart_rect)
         
-        restart_text = main_font.render("Press ENTER to restart or ESC for menu", True, WHITE)
-        restart_rect = restart_text.get_rect(center=(screen.get_width() // 2, screen.get_height() // 2 + 100))
-        screen.blit(restart_text, restart_rect)
+        target.present()
+
+    # Record an unfinished game and flush pending scores before quitting
+    game.save_high_score()
+    leaderboard.close()
+    if telemetry_log:
+        telemetry_log.close()
     
-    pygame.display.flip()
+    # Report how quickly key presses reached the game this session
+    if inputs.latencies:
+        print(f"Input latency: {inputs.summary()}")
+
+    # Clean up
+    pygame.quit()
 
-# Save high score before quitting
-game.save_high_score()
 
-# Clean up
-pygame.quit()
-sys.exit()
\ No newline at end of file
+if __name__ == "__main__":
+    main()
@@ -1,6 +1,17 @@
-import pygame
 import math  # Import the standard math module
-from constants import *
+from constants import (
+    WHITE, GRAY, COLORS,
+    MENU_DECORATION_CELL_SIZE, MENU_DECORATION_SPEED, MENU_DECORATION_FRAMES
+)
+from tetrimino import bevel_colors
+
+# Tetrimino decorations: (shape, blocks, anchor as fractions of the screen size)
+DECORATIONS = (
+    ('L', [(0, 0), (0, 1), (0, 2), (1, 2)], ((1, 4), (1, 5))),
+    ('T', [(0, 0), (-1, 0), (1, 0), (0, 1)], ((3, 4), (1, 5))),
+    ('I', [(0, 0), (1, 0), (2, 0), (3, 0)], ((1, 5), (4, 5))),
+    ('Z', [(0, 0), (1, 0), (1, 1), (2, 1)], ((4, 5), (4, 5)))
+)
 
 class Menu:
     def __init__(self, screen, title_font, button_font):
@@ -8,11 +19,26 @@ class Menu:
         self.title_font = title_font
         self.button_font = button_font
         self.buttons = []
-        self.resize(screen)
         self.animation_time = 0
+        
+        # Decoration state lives across frames and resizes; only the anchor
+        # position depends on the screen size. The rotation frames are built
+        # on the first resize and only depend on MENU_DECORATION_CELL_SIZE
+        self.decorations = [
+            {'shape': blocks, 'color': COLORS[shape], 'anchor': anchor, 'pos': (0, 0), 'rotation': 0.0}
+            for shape, blocks, anchor in DECORATIONS
+        ]
+        self.decoration_frames = []
+        
+        # Text never changes, so render it once
+        self.title_text = title_font.render("TETRIS", True, WHITE)
+        self.subtitle_text = button_font.render("PYTHON EDITION", True, GRAY)
+        self.resize(screen)
     
     def resize(self, screen):
         """Recalculate button positions when screen is resized"""
+        import pygame
+        
         self.screen = screen
         width, height = screen.get_width(), screen.get_height()
         
@@ -36,18 +62,69 @@ class Menu:
             },
             {
                 'rect': pygame.Rect(button_x, start_y + button_height + button_spacing, button_width, button_height),
+                'text': 'BATTLE',
+                'action': 'battle',
+                'hover': False
+            },
+            {
+                'rect': pygame.Rect(button_x, start_y + 2 * (button_height + button_spacing), button_width, button_height),
                 'text': 'QUIT',
                 'action': 'quit',
                 'hover': False
             }
         ]
+        for button in self.buttons:
+            button['label'] = self.button_font.render(button['text'], True, WHITE)
+        
+        for decoration in self.decorations:
+            (x_num, x_den), (y_num, y_den) = decoration['anchor']
+            decoration['pos'] = (width * x_num // x_den, height * y_num // y_den)
+        if not self.decoration_frames:
+            self.decoration_frames = [self.build_frames(decoration) for decoration in self.decorations]
     
-    def update(self):
-        """Update menu state"""
-        self.animation_time += 0.016  # Approximately 60 FPS
+    def build_frames(self, decoration, cell_size=MENU_DECORATION_CELL_SIZE, count=MENU_DECORATION_FRAMES):
+        """Pre-render a decoration at `count` evenly spaced angles.
+        
+        Returns a list of (surface, offset) where offset is the top-left corner
+        of the rotated sprite relative to the piece's pivot, the corner of its
+        (0, 0) block.
+        """
+        import pygame
+        
+        blocks = decoration['shape']
+        min_x = min(x for x, _ in blocks)
+        min_y = min(y for _, y in blocks)
+        columns = max(x for x, _ in blocks) - min_x + 1
+        rows = max(y for _, y in blocks) - min_y + 1
+        sprite = pygame.Surface((columns * cell_size, rows * cell_size), pygame.SRCALPHA)
+        darker_color, _ = bevel_colors(decoration['color'])
+        for x, y in blocks:
+            block_rect = pygame.Rect((x - min_x) * cell_size, (y - min_y) * cell_size, cell_size, cell_size)
+            pygame.draw.rect(sprite, decoration['color'], block_rect)
+            pygame.draw.rect(sprite, darker_color, block_rect, 1)
+        
+        # Sprite center relative to the pivot, turned with each frame
+        center_x = (columns / 2 + min_x) * cell_size
+        center_y = (rows / 2 + min_y) * cell_size
+        frames = []
+        for i in range(count):
+            angle = 360 * i / count
+            cos_a = math.cos(math.radians(angle))
+            sin_a = math.sin(math.radians(angle))
+            # Screen y points down, so this turns clockwise, like a negative pygame angle
+            rotated = pygame.transform.rotate(sprite, -angle)
+            offset_x = center_x * cos_a - center_y * sin_a - rotated.get_width() / 2
+            offset_y = center_x * sin_a + center_y * cos_a - rotated.get_height() / 2
+            frames.append((rotated, (round(offset_x), round(offset_y))))
+        return frames
+    
+    def update(self, dt, mouse_pos):
+        """Advance the menu animations by dt seconds and track the hovered button"""
+        self.animation_time += dt
+        for decoration in self.decorations:
+            decoration['rotation'] = (decoration['rotation'] + MENU_DECORATION_SPEED * dt) % 360
         
         # Update button hover state
-        mouse_pos = pygame.mouse.get_pos()
         for button in self.buttons:
             button['hover'] = button['rect'].collidepoint(mouse_pos)
     
@@ -60,22 +137,22 @@ class Menu:
     
     def draw(self):
         """Draw the menu"""
+        import pygame
+        
         width, height = self.screen.get_width(), self.screen.get_height()
         
         # Draw title with animation
-        title_text = self.title_font.render("TETRIS", True, WHITE)
-        title_rect = title_text.get_rect(center=(width // 2, height // 3))
+        title_rect = self.title_text.get_rect(center=(width // 2, height // 3))
         
         # Add a subtle floating animation to the title - using standard math.sin
         title_offset = int(5 * (1 + math.sin(self.animation_time * 2)))
         title_rect.y -= title_offset
         
-        self.screen.blit(title_text, title_rect)
+        self.screen.blit(self.title_text, title_rect)
         
         # Draw subtitle
-        subtitle_text = self.button_font.render("PYTHON EDITION", True, GRAY)
-        subtitle_rect = subtitle_text.get_rect(center=(width // 2, height // 3 + 50))
-        self.screen.blit(subtitle_text, subtitle_rect)
+        subtitle_rect = self.subtitle_text.get_rect(center=(width // 2, height // 3 + 50))
+        self.screen.blit(self.subtitle_text, subtitle_rect)
         
         # Draw buttons
         for button in self.buttons:
@@ -91,53 +168,18 @@ class Menu:
             pygame.draw.rect(self.screen, border_color, button['rect'], 2, border_radius=5)
             
             # Draw button text
-            text = self.button_font.render(button['text'], True, WHITE)
-            text_rect = text.get_rect(center=button['rect'].center)
-            self.screen.blit(text, text_rect)
+            text_rect = button['label'].get_rect(center=button['rect'].center)
+            self.screen.blit(button['label'], text_rect)
         
         # Draw tetrimino decorations
         self.draw_decorations()
     
     def draw_decorations(self):
-        """Draw tetrimino decorations around the menu"""
-        width, height = self.screen.get_width(), self.screen.get_height()
-        
-        # Define some tetrimino shapes to draw as decorations
-        decorations = [
-            # L shape
-            {'shape': [(0, 0), (0, 1), (0, 2), (1, 2)], 'color': COLORS['L'], 'pos': (width // 4, height // 5), 'rotation': 0},
-            # T shape
-            {'shape': [(0, 0), (-1, 0), (1, 0), (0, 1)], 'color': COLORS['T'], 'pos': (width * 3 // 4, height // 5), 'rotation': 0},
-            # I shape
-            {'shape': [(0, 0), (1, 0), (2, 0), (3, 0)], 'color': COLORS['I'], 'pos': (width // 5, height * 4 // 5), 'rotation': 0},
-            # Z shape
-            {'shape': [(0, 0), (1, 0), (1, 1), (2, 1)], 'color': COLORS['Z'], 'pos': (width * 4 // 5, height * 4 // 5), 'rotation': 0}
-        ]
-        
-        cell_size = 20
-        
-        for decoration in decorations:
-            # Add animation to rotate the pieces slowly
-            rotation_speed = 0.2
-            decoration['rotation'] = (decoration['rotation'] + rotation_speed) % 360
-            angle = decoration['rotation']
-            
-            # Draw each block of the tetrimino
-            for x, y in decoration['shape']:
-                # Apply rotation - using standard math functions
-                cos_a = math.cos(math.radians(angle))
-                sin_a = math.sin(math.radians(angle))
-                rot_x = x * cos_a - y * sin_a
-                rot_y = x * sin_a + y * cos_a
-                
-                # Calculate position
-                pos_x = decoration['pos'][0] + rot_x * cell_size
-                pos_y = decoration['pos'][1] + rot_y * cell_size
-                
-                # Draw block
-                block_rect = pygame.Rect(pos_x, pos_y, cell_size, cell_size)
-                pygame.draw.rect(self.screen, decoration['color'], block_rect)
-                
-                # Draw a slightly darker border
-                darker_color = tuple(max(0, c - 40) for c in decoration['color'])
-                pygame.draw.rect(self.screen, darker_color, block_rect, 1)
\ No newline at end of file
+        """Draw tetrimino decorations around the menu, one pre-rendered frame each"""
+        count = MENU_DECORATION_FRAMES
+        sprites = []
+        for decoration, frames in zip(self.decorations, self.decoration_frames):
+            sprite, (offset_x, offset_y) = frames[int(decoration['rotation'] * count / 360) % count]
+            x, y = decoration['pos']
+            sprites.append((sprite, (x + offset_x, y + offset_y)))
+        self.screen.blits(sprites, doreturn=False)
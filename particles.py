@@ -0,0 +1,248 @@
+"""Particle effects for line clears, hard-drop trails and level-ups.
+
+Particle state lives in NumPy arrays preallocated for PARTICLE_CAPACITY
+particles, with the live ones packed at the front. Emitting fills the next
+free slots, update() integrates every live particle at once and compacts
+the survivors, and draw() blits cached sprites (one per color and fade
+step) with a single Surface.blits call. Positions and velocities are in
+board cells, so effects follow resizes and scrolling.
+
+Requires NumPy; Game plays without effects when it is missing.
+
+Usage: python particles.py bench [--particles N] [--frames N]
+"""
+import argparse
+import gc
+import os
+import time
+import numpy as np
+from constants import (
+    COLORS, WHITE, BG_COLOR, REPLAY_TICK, SCREEN_WIDTH, SCREEN_HEIGHT,
+    PARTICLE_CAPACITY, PARTICLE_GRAVITY, PARTICLE_FADE_STEPS
+)
+
+# Line clear: sparks thrown out of every cleared cell
+CLEAR_PER_CELL = 8
+CLEAR_SPEED = 12.0
+CLEAR_LIFE = 0.8
+
+# Hard drop: slow motes left along the path of each block
+TRAIL_PER_CELL = 2
+TRAIL_MAX_CELLS = 20
+TRAIL_SPEED = 1.5
+TRAIL_LIFE = 0.35
+
+# Level up: a fountain along the row of the clear that reached it
+LEVEL_PER_COLUMN = 24
+LEVEL_SPEED = 10.0
+LEVEL_LIFT = -18.0
+LEVEL_LIFE = 1.2
+
+# Per-particle arrays, all `capacity` long
+ARRAYS = ("position", "velocity", "gravity", "life", "duration", "color")
+
+
+class ParticleSystem:
+    """Fixed-capacity particle pool updated and drawn in bulk"""
+
+    def __init__(self, capacity=PARTICLE_CAPACITY, seed=None):
+        self.capacity = capacity
+        self.count = 0
+        self.position = np.zeros((capacity, 2), dtype=np.float32)
+        self.velocity = np.zeros((capacity, 2), dtype=np.float32)
+        self.gravity = np.zeros(capacity, dtype=np.float32)
+        self.life = np.zeros(capacity, dtype=np.float32)
+        self.duration = np.ones(capacity, dtype=np.float32)
+        self.color = np.zeros(capacity, dtype=np.int32)
+        self.rng = np.random.default_rng(seed)
+
+        # Colors seen so far; sprites[color * PARTICLE_FADE_STEPS + step]
+        self.palette = []
+        self.palette_index = {}
+        self.sprites = []
+        self.sprite_size = 0
+
+    def clear(self):
+        """Drop every live particle"""
+        self.count = 0
+
+    def __getstate__(self):
+        """Pickle the live particles only, without the sprite cache (surfaces do not pickle)"""
+        state = dict(self.__dict__, sprites=[], sprite_size=0)
+        for name in ARRAYS:
+            state[name] = getattr(self, name)[:self.count].copy()
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        for name in ARRAYS:
+            live = state[name]
+            array = np.ones if name == "duration" else np.zeros
+            setattr(self, name, array((self.capacity,) + live.shape[1:], dtype=live.dtype))
+            getattr(self, name)[:self.count] = live
+
+    def color_index(self, color):
+        """Return the palette index of a color, adding it if needed"""
+        index = self.palette_index.get(color)
+        if index is None:
+            index = self.palette_index[color] = len(self.palette)
+            self.palette.append(color)
+        return index
+
+    def emit(self, x, y, velocity_x, velocity_y, life, color, gravity=PARTICLE_GRAVITY):
+        """Spawn len(x) particles; the other arguments are arrays or scalars.
+
+        Returns the number spawned, fewer than asked when the pool is full.
+        """
+        start = self.count
+        count = min(len(x), self.capacity - start)
+        if count <= 0:
+            return 0
+        end = start + count
+        self.position[start:end, 0] = x[:count]
+        self.position[start:end, 1] = y[:count]
+        self.velocity[start:end, 0] = velocity_x[:count] if np.ndim(velocity_x) else velocity_x
+        self.velocity[start:end, 1] = velocity_y[:count] if np.ndim(velocity_y) else velocity_y
+        self.life[start:end] = life[:count] if np.ndim(life) else life
+        self.duration[start:end] = self.life[start:end]
+        self.color[start:end] = color[:count] if np.ndim(color) else color
+        self.gravity[start:end] = gravity
+        self.count = end
+        return count
+
+    def burst(self, x, y, colors, per_point, speed, life, gravity=PARTICLE_GRAVITY, lift=0.0):
+        """Throw per_point particles in random directions from each point"""
+        x = np.asarray(x, dtype=np.float32)
+        colors = np.broadcast_to(np.asarray(colors, dtype=np.int32), x.shape)
+        x = np.repeat(x, per_point)
+        y = np.repeat(np.asarray(y, dtype=np.float32), per_point)
+        colors = np.repeat(colors, per_point)
+        angle = self.rng.uniform(0, 2 * np.pi, len(x))
+        magnitude = speed * self.rng.uniform(0.2, 1.0, len(x))
+        lives = life * self.rng.uniform(0.5, 1.0, len(x))
+        return self.emit(
+            x, y, np.cos(angle) * magnitude, np.sin(angle) * magnitude + lift,
+            lives, colors, gravity
+        )
+
+    def line_clear(self, cells):
+        """Sparks from cleared cells, given as (x, y, color)"""
+        if not cells:
+            return 0
+        x, y, colors = zip(*cells)
+        return self.burst(
+            np.add(x, 0.5), np.add(y, 0.5), [self.color_index(color) for color in colors],
+            CLEAR_PER_CELL, CLEAR_SPEED, CLEAR_LIFE
+        )
+
+    def drop_trail(self, blocks, distance, color):
+        """Motes along the cells a hard-dropped piece fell through"""
+        distance = min(distance, TRAIL_MAX_CELLS)
+        if distance <= 0:
+            return 0
+        steps = np.arange(1, distance + 1, dtype=np.float32)
+        x = np.concatenate([np.full(distance, block_x + 0.5, dtype=np.float32) for block_x, _ in blocks])
+        y = np.concatenate([block_y + 0.5 - steps for _, block_y in blocks])
+        x += self.rng.uniform(-0.4, 0.4, len(x))
+        return self.burst(x, y, self.color_index(color), TRAIL_PER_CELL, TRAIL_SPEED, TRAIL_LIFE, gravity=0.0)
+
+    def level_up(self, width, y):
+        """A fountain in every piece color along row y"""
+        x = np.arange(width, dtype=np.float32) + 0.5
+        colors = [self.color_index(COLORS[shape]) for shape in COLORS]
+        colors = np.resize(colors, width)
+        return self.burst(
+            x, np.full(width, y + 0.5, dtype=np.float32), colors,
+            LEVEL_PER_COLUMN, LEVEL_SPEED, LEVEL_LIFE, lift=LEVEL_LIFT
+        )
+
+    def update(self, dt):
+        """Move every live particle and drop the expired ones"""
+        count = self.count
+        if not count:
+            return
+        velocity = self.velocity[:count]
+        velocity[:, 1] += self.gravity[:count] * dt
+        self.position[:count] += velocity * dt
+        life = self.life[:count]
+        life -= dt
+
+        alive = life > 0
+        if not alive.all():
+            keep = np.flatnonzero(alive)
+            for name in ARRAYS:
+                array = getattr(self, name)
+                array[:len(keep)] = array[keep]
+            self.count = len(keep)
+
+    def build_sprites(self, size):
+        """Pre-render a square per palette color and fade step"""
+        import pygame
+
+        self.sprite_size = size
+        self.sprites = []
+        for color in self.palette:
+            for step in range(PARTICLE_FADE_STEPS):
+                sprite = pygame.Surface((size, size))
+                sprite.fill(color)
+                sprite.set_alpha(255 * (step + 1) // PARTICLE_FADE_STEPS)
+                self.sprites.append(sprite)
+
+    def draw(self, screen, offset_x, offset_y, cell_size):
+        """Blit every live particle; (offset_x, offset_y) is the pixel position of cell (0, 0)"""
+        count = self.count
+        if not count:
+            return
+        size = max(2, cell_size // 5)
+        if size != self.sprite_size or len(self.sprites) < len(self.palette) * PARTICLE_FADE_STEPS:
+            self.build_sprites(size)
+
+        step = (self.life[:count] / self.duration[:count] * PARTICLE_FADE_STEPS).astype(np.int32)
+        np.clip(step, 0, PARTICLE_FADE_STEPS - 1, out=step)
+        keys = self.color[:count] * PARTICLE_FADE_STEPS + step
+        pixels = (self.position[:count] * cell_size - size / 2).astype(np.int32)
+        pixels += (offset_x, offset_y)
+
+        screen.blits(zip(map(self.sprites.__getitem__, keys.tolist()), pixels.tolist()), doreturn=False)
+
+
+def bench(particles, frames):
+    """Keep the pool at about `particles` live particles and time update plus draw"""
+    os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+    import pygame
+
+    pygame.init()
+    screen = pygame.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT))
+    system = ParticleSystem(max(particles, PARTICLE_CAPACITY), seed=0)
+    cells = [(x, 19, color) for x, color in zip(range(10), list(COLORS.values()) + [WHITE] * 3)]
+    cell_size = 30
+    gc.freeze()
+
+    times = []
+    for _ in range(frames):
+        while system.count < particles:
+            system.line_clear(cells)
+        start = time.perf_counter()
+        system.update(REPLAY_TICK)
+        screen.fill(BG_COLOR)
+        system.draw(screen, 250, 50, cell_size)
+        times.append((time.perf_counter() - start) * 1000)
+    pygame.quit()
+
+    times.sort()
+    print(f"{particles} particles, {frames} frames: mean {sum(times) / len(times):.2f} ms, "
+          f"p99 {times[int(len(times) * 0.99)]:.2f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    commands = parser.add_subparsers(dest="command", required=True)
+    bench_parser = commands.add_parser("bench", help="time update and draw with a full pool")
+    bench_parser.add_argument("--particles", type=int, default=5000)
+    bench_parser.add_argument("--frames", type=int, default=600)
+    args = parser.parse_args()
+    bench(args.particles, args.frames)
+
+
+if __name__ == "__main__":
+    main()
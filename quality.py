@@ -0,0 +1,109 @@
+"""Adaptive rendering quality driven by a frame-time budget.
+
+QualityGovernor watches frame times and steps down one quality tier when
+the last QUALITY_DOWN_FRAMES frames average over the budget, and back up
+when a QUALITY_UP_FRAMES window averages under QUALITY_HEADROOM of it. A
+step up that has to be undone right away doubles the window before the
+next try, so a machine sitting on the edge of a tier does not oscillate.
+
+Usage: python quality.py bench [--frames N]    draw time of every tier
+"""
+import argparse
+import os
+import time
+from collections import deque
+from constants import (
+    BG_COLOR, SCREEN_WIDTH, SCREEN_HEIGHT, REPLAY_TICK,
+    QUALITY_FULL, QUALITY_LOW_RESOLUTION, QUALITY_FRAME_BUDGET_MS,
+    QUALITY_DOWN_FRAMES, QUALITY_UP_FRAMES, QUALITY_HEADROOM
+)
+
+TIER_NAMES = ("full", "no bevels", "solid ghost", "no animations", "low resolution")
+# Longest wait before retrying a step up, in multiples of QUALITY_UP_FRAMES
+MAX_BACKOFF = 16
+
+
+class QualityGovernor:
+    """Pick a quality tier from recent frame times, with hysteresis"""
+
+    def __init__(self, budget_ms=QUALITY_FRAME_BUDGET_MS, tier=QUALITY_FULL):
+        self.budget_ms = budget_ms
+        self.tier = tier
+        self.recent = deque(maxlen=QUALITY_DOWN_FRAMES)
+        self.up_frames = QUALITY_UP_FRAMES
+        self.window_frames = 0
+        self.window_ms = 0.0
+        self.stepped_up = False
+
+    def record(self, frame_ms):
+        """Add one frame's time; return True when the tier changed"""
+        self.recent.append(frame_ms)
+        self.window_frames += 1
+        self.window_ms += frame_ms
+
+        if (len(self.recent) == self.recent.maxlen and self.tier < QUALITY_LOW_RESOLUTION
+                and sum(self.recent) > self.budget_ms * len(self.recent)):
+            if self.stepped_up:
+                # The last step up could not hold: wait longer before the next one
+                self.up_frames = min(self.up_frames * 2, QUALITY_UP_FRAMES * MAX_BACKOFF)
+            self._change(self.tier + 1, stepped_up=False)
+            return True
+
+        if self.window_frames >= self.up_frames:
+            headroom = self.window_ms < self.budget_ms * QUALITY_HEADROOM * self.window_frames
+            if headroom and self.tier > QUALITY_FULL:
+                self._change(self.tier - 1, stepped_up=True)
+                return True
+            # A whole window went by without stepping down: the current tier holds
+            self.stepped_up = False
+            self.window_frames = 0
+            self.window_ms = 0.0
+        return False
+
+    def _change(self, tier, stepped_up):
+        self.tier = tier
+        self.stepped_up = stepped_up
+        self.recent.clear()
+        self.window_frames = 0
+        self.window_ms = 0.0
+
+
+def bench(frames):
+    """Time Game.draw at every tier on a board in play"""
+    os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+    import pygame
+    from game import Game
+    from main import load_fonts
+    from bot import greedy_controller, bot_step
+
+    pygame.init()
+    screen = pygame.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT))
+    main_font, _ = load_fonts()
+    for tier, name in enumerate(TIER_NAMES):
+        game = Game(screen, main_font, seed=0)
+        game.quality = tier
+        controller = greedy_controller(0, 0.1)
+        elapsed = 0.0
+        for _ in range(frames):
+            bot_step(game, controller)
+            start = time.perf_counter()
+            screen.fill(BG_COLOR)
+            game.draw()
+            elapsed += time.perf_counter() - start
+            if game.game_over:
+                game.reset(0)
+        print(f"tier {tier} ({name}): {elapsed / frames * 1000:.2f} ms per frame")
+    pygame.quit()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    commands = parser.add_subparsers(dest="command", required=True)
+    bench_parser = commands.add_parser("bench", help="time Game.draw at every quality tier")
+    bench_parser.add_argument("--frames", type=int, default=int(10 / REPLAY_TICK))
+    args = parser.parse_args()
+    bench(args.frames)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,165 @@
+"""Offscreen render target presented to a resizable window.
+
+The game, menu and overlays draw into a canvas at RENDER_RESOLUTION, which
+present() scales to the window in one step and letterboxes to keep its
+aspect ratio: by whole factors when upscaling (pixel-exact with
+RENDER_INTEGER_SCALING), smoothly when the window is smaller than the
+canvas. Window resize events are coalesced: while the user drags, frames
+keep being presented with the last layout, and the window surface, scaled
+buffer and letterbox are rebuilt once, RESIZE_DEBOUNCE_MS after the last
+event. With RENDER_RESOLUTION set to None the canvas follows the settled
+window size instead and on_layout(canvas) rebuilds the views' layouts.
+
+Usage: python render_target.py bench [--size WxH] [--frames N] [--events N]
+"""
+import argparse
+import os
+import time
+from constants import (
+    BG_COLOR, SCREEN_WIDTH, SCREEN_HEIGHT,
+    RENDER_RESOLUTION, RENDER_INTEGER_SCALING, RESIZE_DEBOUNCE_MS
+)
+
+
+class RenderTarget:
+    """A canvas at the internal resolution and the transform onto the window"""
+
+    def __init__(self, window, resolution=RENDER_RESOLUTION, on_layout=None):
+        import pygame
+
+        self.window = window
+        self.resolution = resolution
+        self.on_layout = on_layout
+        self.canvas = pygame.Surface(resolution or window.get_size()).convert()
+        self.size = window.get_size()
+        self.pending_size = None
+        self.resize_time = 0
+        self.layouts = 0
+        self.layout()
+
+    def layout(self):
+        """Place the scaled canvas in the window and allocate its buffer"""
+        import pygame
+
+        window_width, window_height = self.size
+        canvas_width, canvas_height = self.canvas.get_size()
+        scale = min(window_width / canvas_width, window_height / canvas_height)
+        if RENDER_INTEGER_SCALING and scale >= 1:
+            scale = int(scale)
+        self.dest = pygame.Rect(0, 0, max(1, round(canvas_width * scale)), max(1, round(canvas_height * scale)))
+        self.dest.center = (window_width // 2, window_height // 2)
+        self.smooth = scale < 1
+        # No buffer when the canvas is shown 1:1
+        self.scaled = None if self.dest.size == self.canvas.get_size() else pygame.Surface(self.dest.size).convert()
+
+        dest = self.dest
+        bars = (
+            (0, 0, window_width, dest.top),
+            (0, dest.bottom, window_width, window_height - dest.bottom),
+            (0, dest.top, dest.left, dest.height),
+            (dest.right, dest.top, window_width - dest.right, dest.height)
+        )
+        self.bars = [pygame.Rect(bar) for bar in bars if bar[2] > 0 and bar[3] > 0]
+        self.layouts += 1
+
+    def request_resize(self, size, now=None):
+        """Note a window resize event; the layout is rebuilt once they stop"""
+        import pygame
+
+        size = tuple(size)
+        if size == self.size and self.pending_size is None:
+            return
+        self.pending_size = size
+        self.resize_time = pygame.time.get_ticks() if now is None else now
+
+    def settle(self, now=None):
+        """Apply a pending resize once no event came for RESIZE_DEBOUNCE_MS; return True if applied"""
+        import pygame
+
+        if self.pending_size is None:
+            return False
+        if now is None:
+            now = pygame.time.get_ticks()
+        if now - self.resize_time < RESIZE_DEBOUNCE_MS:
+            return False
+
+        self.size, self.pending_size = self.pending_size, None
+        self.window = pygame.display.set_mode(self.size, pygame.RESIZABLE)
+        if self.resolution is None and self.size != self.canvas.get_size():
+            self.canvas = pygame.Surface(self.size).convert()
+            if self.on_layout:
+                self.on_layout(self.canvas)
+        self.layout()
+        return True
+
+    def to_canvas(self, pos):
+        """Map a window position (such as the mouse's) to canvas coordinates"""
+        dest = self.dest
+        return (
+            (pos[0] - dest.x) * self.canvas.get_width() // dest.width,
+            (pos[1] - dest.y) * self.canvas.get_height() // dest.height
+        )
+
+    def present(self):
+        """Scale the canvas onto the window and flip it"""
+        import pygame
+
+        self.settle()
+        window = self.window
+        if self.pending_size is None:
+            for bar in self.bars:
+                window.fill(BG_COLOR, bar)
+        else:
+            # The window is being resized: its new area holds garbage until the layout settles
+            window.fill(BG_COLOR)
+
+        if self.scaled is None:
+            window.blit(self.canvas, self.dest)
+        else:
+            scale = pygame.transform.smoothscale if self.smooth else pygame.transform.scale
+            scale(self.canvas, self.dest.size, self.scaled)
+            window.blit(self.scaled, self.dest)
+        pygame.display.flip()
+
+
+def bench(size, frames, events):
+    """Time present() at a window size, then a drag of `events` resize events"""
+    os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+    import pygame
+
+    pygame.init()
+    window = pygame.display.set_mode(size, pygame.RESIZABLE)
+    target = RenderTarget(window)
+
+    start = time.perf_counter()
+    for _ in range(frames):
+        target.canvas.fill(BG_COLOR)
+        target.present()
+    elapsed = time.perf_counter() - start
+    print(f"canvas {target.canvas.get_width()}x{target.canvas.get_height()} shown at "
+          f"{target.dest.width}x{target.dest.height} in a {size[0]}x{size[1]} window: "
+          f"{elapsed / frames * 1000:.2f} ms per present")
+
+    # One event per frame of a drag, then quiet until the layout settles
+    layouts = target.layouts
+    for i in range(events):
+        target.request_resize((size[0] - i, size[1] - i), now=i * 16)
+        target.settle(now=i * 16)
+    target.settle(now=events * 16 + RESIZE_DEBOUNCE_MS)
+    print(f"{events} resize events: {target.layouts - layouts} relayout(s)")
+    pygame.quit()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    commands = parser.add_subparsers(dest="command", required=True)
+    bench_parser = commands.add_parser("bench", help="time presenting the canvas to a large window")
+    bench_parser.add_argument("--size", default=f"{SCREEN_WIDTH * 3}x{SCREEN_HEIGHT * 2}")
+    bench_parser.add_argument("--frames", type=int, default=300)
+    bench_parser.add_argument("--events", type=int, default=120)
+    args = parser.parse_args()
+    bench(tuple(int(value) for value in args.size.split("x")), args.frames, args.events)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,299 @@
+"""Recorded games and the single-file replay archive.
+
+A replay is a seed plus the player's inputs, tagged with the simulation tick
+they happened on. Games are re-simulated headless at a fixed REPLAY_TICK.
+
+Archive layout (little-endian):
+    header  magic, version, game count
+    index   one fixed-size entry per game: blob offset and size, seed,
+            final score, frames, lines and level, and the rules it was
+            played with (board height and width, rotation system)
+    blobs   packed (frame delta, action) pairs for each game
+
+Readers map the file with mmap and slice blobs without copying, so tools can
+filter on the index and only touch the games they need.
+
+Usage: python replay.py ARCHIVE [--min-score N] [--max-score N] [--level N]
+                                [--min-frames N] [--max-frames N]
+"""
+import argparse
+import mmap
+import os
+import struct
+import sys
+import tempfile
+from constants import REPLAY_TICK, GRID_WIDTH, GRID_HEIGHT, ROTATION_SYSTEM
+
+MAGIC = b"TRPA"
+VERSION = 2
+HEADER = struct.Struct("<4sHHQ")              # magic, version, reserved, count
+# offset, size, seed, score, frames, lines, level, height, width, rotation system, reserved
+INDEX_ENTRY = struct.Struct("<QIIIIIHHBBH")
+INPUT = struct.Struct("<HB")                # frames since previous input, action
+
+# Actions
+NOOP = 0  # Padding for gaps longer than a frame delta can hold
+LEFT = 1
+RIGHT = 2
+ROTATE_CW = 3
+ROTATE_CCW = 4
+HARD_DROP = 5
+SOFT_DROP_ON = 6
+SOFT_DROP_OFF = 7
+
+# Input bits: one bit per action (1 << action), as produced by controllers.
+# Actions set in the same tick are applied in this order
+INPUT_ACTIONS = (
+    SOFT_DROP_OFF, SOFT_DROP_ON, LEFT, RIGHT,
+    ROTATE_CW, ROTATE_CCW, HARD_DROP
+)
+
+MAX_DELTA = 0xFFFF
+
+# Rotation systems (rotation.ROTATION_SYSTEMS keys) by their code in the index; append only
+ROTATION_CODES = ("srs", "classic", "ars")
+
+
+def input_bits(*actions):
+    """Pack actions into an input bitmask"""
+    bits = 0
+    for action in actions:
+        bits |= 1 << action
+    return bits
+
+
+def apply_action(game, action):
+    """Apply a recorded action to a Game"""
+    if action == LEFT:
+        game.move_piece(-1)
+    elif action == RIGHT:
+        game.move_piece(1)
+    elif action == ROTATE_CW:
+        game.rotate_piece()
+    elif action == ROTATE_CCW:
+        game.rotate_piece(clockwise=False)
+    elif action == HARD_DROP:
+        game.hard_drop()
+    elif action == SOFT_DROP_ON:
+        game.move_down = True
+    elif action == SOFT_DROP_OFF:
+        game.move_down = False
+
+
+class ReplayRecorder:
+    """Collects the inputs of one game as a packed blob"""
+
+    def __init__(self, seed):
+        self.seed = seed
+        self.frame = 0
+        self._last_frame = 0
+        self._data = bytearray()
+
+    def tick(self):
+        """Advance to the next simulation frame"""
+        self.frame += 1
+
+    def record(self, action):
+        """Record an action on the current frame"""
+        delta = self.frame - self._last_frame
+        while delta > MAX_DELTA:
+            self._data += INPUT.pack(MAX_DELTA, NOOP)
+            delta -= MAX_DELTA
+        self._data += INPUT.pack(delta, action)
+        self._last_frame = self.frame
+
+    def blob(self):
+        return bytes(self._data)
+
+
+def iter_inputs(blob):
+    """Yield (frame, action) pairs from a packed input blob"""
+    frame = 0
+    for delta, action in INPUT.iter_unpack(blob):
+        frame += delta
+        if action != NOOP:
+            yield frame, action
+
+
+def play(seed, blob, frames=None, width=GRID_WIDTH, height=GRID_HEIGHT, rotation_system=ROTATION_SYSTEM):
+    """Re-simulate a recorded game headless, on its board and rotation system, and return the final Game"""
+    from game import Game
+
+    game = Game(None, None, seed=seed, rotation_system=rotation_system, width=width, height=height)
+    inputs = iter_inputs(blob)
+    pending = next(inputs, None)
+    frame = 0
+    while not game.game_over and (frames is None or frame < frames):
+        while pending is not None and pending[0] == frame:
+            apply_action(game, pending[1])
+            pending = next(inputs, None)
+        if game.update(REPLAY_TICK):
+            break
+        frame += 1
+        if frames is None and pending is None:
+            break
+    return game
+
+
+class ReplayArchiveWriter:
+    """Builds an archive; blobs are spooled to a temp file until close()"""
+
+    def __init__(self, path):
+        self.path = path
+        self._entries = []
+        self._blob_size = 0
+        self._spool = tempfile.TemporaryFile()
+
+    def add(self, seed, blob, score=0, frames=0, lines=0, level=1,
+            width=GRID_WIDTH, height=GRID_HEIGHT, rotation_system=ROTATION_SYSTEM):
+        """Append one game to the archive"""
+        self._entries.append((
+            self._blob_size, len(blob), seed, score, frames, lines, level,
+            height, width, ROTATION_CODES.index(rotation_system), 0
+        ))
+        self._spool.write(blob)
+        self._blob_size += len(blob)
+
+    def add_recording(self, recorder, game):
+        """Append a recorded game together with its final state"""
+        self.add(recorder.seed, recorder.blob(), game.score, recorder.frame, game.lines_cleared, game.level,
+                 game.grid.width, game.grid.height, game.rotation_name)
+
+    def close(self):
+        """Write header, index and blobs, then move the archive into place atomically"""
+        blobs_start = HEADER.size + INDEX_ENTRY.size * len(self._entries)
+        directory = os.path.dirname(os.path.abspath(self.path))
+        fd, temp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(HEADER.pack(MAGIC, VERSION, 0, len(self._entries)))
+                for offset, *fields in self._entries:
+                    f.write(INDEX_ENTRY.pack(blobs_start + offset, *fields))
+                self._spool.seek(0)
+                while True:
+                    chunk = self._spool.read(1 << 20)
+                    if not chunk:
+                        break
+                    f.write(chunk)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(temp_path, self.path)
+        except BaseException:
+            os.unlink(temp_path)
+            raise
+        finally:
+            self._spool.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+        else:
+            self._spool.close()
+
+
+class ReplayArchive:
+    """Read-only, memory-mapped view of an archive"""
+
+    def __init__(self, path):
+        self._file = open(path, "rb")
+        if os.fstat(self._file.fileno()).st_size < HEADER.size:
+            self._file.close()
+            raise ValueError(f"{path} is not a replay archive")
+        self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        self._view = memoryview(self._map)
+        magic, version, _, self.count = HEADER.unpack_from(self._view)
+        self._index = self._view[HEADER.size:HEADER.size + INDEX_ENTRY.size * self.count]
+        if magic != MAGIC or version != VERSION:
+            self.close()
+            raise ValueError(f"{path} is not a version {VERSION} replay archive")
+
+    def __len__(self):
+        return self.count
+
+    def entry(self, i):
+        """Return the index entry of game i as a dict"""
+        offset, size, seed, score, frames, lines, level, height, width, rotation, _ = INDEX_ENTRY.unpack_from(
+            self._index, i * INDEX_ENTRY.size
+        )
+        return {"offset": offset, "size": size, "seed": seed, "score": score,
+                "frames": frames, "lines": lines, "level": level,
+                "width": width, "height": height, "rotation_system": ROTATION_CODES[rotation]}
+
+    def blob(self, i):
+        """Return game i's input blob as a zero-copy memoryview"""
+        offset, size = struct.unpack_from("<QI", self._index, i * INDEX_ENTRY.size)
+        return self._view[offset:offset + size]
+
+    def filter(self, min_score=None, max_score=None, level=None, min_frames=None, max_frames=None):
+        """Yield the numbers of the games matching every given bound, reading only the index"""
+        for i, (_, _, _, score, frames, _, game_level, *_) in enumerate(INDEX_ENTRY.iter_unpack(self._index)):
+            if min_score is not None and score < min_score:
+                continue
+            if max_score is not None and score > max_score:
+                continue
+            if level is not None and game_level != level:
+                continue
+            if min_frames is not None and frames < min_frames:
+                continue
+            if max_frames is not None and frames > max_frames:
+                continue
+            yield i
+
+    def index_array(self):
+        """Return the index as a zero-copy NumPy record array (requires NumPy)"""
+        import numpy as np
+
+        dtype = np.dtype([
+            ("offset", "<u8"), ("size", "<u4"), ("seed", "<u4"), ("score", "<u4"),
+            ("frames", "<u4"), ("lines", "<u4"), ("level", "<u2"), ("height", "<u2"),
+            ("width", "u1"), ("rotation_system", "u1"), ("reserved", "<u2")
+        ])
+        return np.frombuffer(self._index, dtype=dtype)
+
+    def play(self, i):
+        """Re-simulate game i and return the final Game"""
+        entry = self.entry(i)
+        return play(entry["seed"], self.blob(i), entry["frames"],
+                    entry["width"], entry["height"], entry["rotation_system"])
+
+    def close(self):
+        """Unmap the archive; blob views handed out must be released first"""
+        self._index.release()
+        self._view.release()
+        self._map.close()
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="List the games in a replay archive")
+    parser.add_argument("archive")
+    parser.add_argument("--min-score", type=int)
+    parser.add_argument("--max-score", type=int)
+    parser.add_argument("--level", type=int)
+    parser.add_argument("--min-frames", type=int)
+    parser.add_argument("--max-frames", type=int)
+    args = parser.parse_args()
+
+    with ReplayArchive(args.archive) as archive:
+        matches = 0
+        for i in archive.filter(args.min_score, args.max_score, args.level, args.min_frames, args.max_frames):
+            entry = archive.entry(i)
+            print(f"{i:>8}  seed {entry['seed']:>10}  score {entry['score']:>7}  "
+                  f"level {entry['level']:>2}  lines {entry['lines']:>4}  frames {entry['frames']:>7}  "
+                  f"board {entry['width']}x{entry['height']} {entry['rotation_system']}")
+            matches += 1
+        print(f"{matches} of {len(archive)} games")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
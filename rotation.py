@@ -0,0 +1,60 @@
+"""Rotation systems compiled into flat kick tables.
+
+A compiled system is indexed as system[shape][from_rotation][direction] with
+shape in PIECE_TYPES order and direction CLOCKWISE or COUNTER_CLOCKWISE.
+Each entry is (target_rotation, kicks) where every kick is
+(dx, dy, blocks): the kick offset and the target rotation's blocks already
+shifted by it, so rotating is a table lookup and a collision test per kick.
+"""
+from constants import PIECE_TYPES, SHAPES, WALL_KICK_DATA, WALL_KICK_I
+
+CLOCKWISE = 0
+COUNTER_CLOCKWISE = 1
+
+
+def compile_system(kick_offsets):
+    """Build a kick table from kick_offsets(shape_type, from_rotation, to_rotation)"""
+    system = []
+    for shape_type in PIECE_TYPES:
+        rotations = []
+        for rotation in range(4):
+            directions = []
+            for target in ((rotation + 1) % 4, (rotation - 1) % 4):
+                blocks = SHAPES[shape_type][target]
+                kicks = tuple(
+                    (dx, dy, tuple((x + dx, y + dy) for x, y in blocks))
+                    for dx, dy in kick_offsets(shape_type, rotation, target)
+                )
+                directions.append((target, kicks))
+            rotations.append(tuple(directions))
+        system.append(tuple(rotations))
+    return tuple(system)
+
+
+def srs_kicks(shape_type, rotation, target):
+    """Super Rotation System: the kick table of the transition actually made"""
+    kick_data = WALL_KICK_I if shape_type == 'I' else WALL_KICK_DATA
+    return kick_data[f"{rotation}->{target}"]
+
+
+def classic_kicks(shape_type, rotation, target):
+    """No kicks: the piece rotates in place or not at all"""
+    return [(0, 0)]
+
+
+def ars_kicks(shape_type, rotation, target):
+    """Arika-style kicks: in place, then one cell right, then one cell left (never for I)"""
+    if shape_type == 'I':
+        return [(0, 0)]
+    return [(0, 0), (1, 0), (-1, 0)]
+
+
+SRS = compile_system(srs_kicks)
+CLASSIC = compile_system(classic_kicks)
+ARS = compile_system(ars_kicks)
+
+ROTATION_SYSTEMS = {
+    "srs": SRS,
+    "classic": CLASSIC,
+    "ars": ARS
+}
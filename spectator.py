@@ -0,0 +1,455 @@
+"""Spectator feed: keyframes plus per-tick deltas, fanned out to many viewers.
+
+A keyframe carries the whole board as color indices, the falling and next
+pieces and the sidebar counters. A delta carries only what changed since the
+previous tick: a bitmask of changed rows, then for each of those rows a cell
+bitmask and the color index of every filled cell, the piece when it moved or
+rotated, and the counters when they changed.
+
+SpectatorBroadcaster encodes each tick once and queues the same bytes for
+every subscriber. Viewers whose backlog exceeds SPECTATOR_MAX_BACKLOG are
+dropped to keyframe-only until the transport has accepted a catch-up keyframe
+and everything queued before it.
+
+Usage:
+    python spectator.py serve [--port PORT]    stream a bot game
+    python spectator.py watch HOST [--port PORT]
+    python spectator.py bench [--viewers N] [--ticks N]
+"""
+import argparse
+import asyncio
+import struct
+import sys
+import time
+from collections import deque
+from constants import (
+    COLORS, GARBAGE_COLOR, BG_COLOR, GRID_COLOR, WHITE, REPLAY_TICK,
+    SPECTATOR_PORT, SPECTATOR_KEYFRAME_INTERVAL, SPECTATOR_MAX_BACKLOG
+)
+from telemetry import PIECE_TYPES, PIECE_INDEX, NO_PIECE
+from versus import StreamConnection, loopback_pair, random_controller
+from bot import bot_step
+
+# Frame types
+KEYFRAME = 1
+DELTA = 2
+
+# Delta flags
+ROWS = 1
+PIECE = 2
+NEXT = 4
+COUNTERS = 8
+
+FRAME_HEADER = struct.Struct("<BIB")   # type, tick, flags
+DIMENSIONS = struct.Struct("<HH")      # width, height
+PIECE_STATE = struct.Struct("<BBhh")   # shape, rotation, x, y
+NEXT_STATE = struct.Struct("<B")
+COUNTER_STATE = struct.Struct("<IIHI")  # score, high score, level, lines
+
+# Color index 0 is an empty cell, 1-7 the pieces in PIECE_TYPES order, then garbage
+PALETTE = [None] + [COLORS[shape] for shape in PIECE_TYPES] + [GARBAGE_COLOR]
+GARBAGE_INDEX = len(PALETTE) - 1
+COLOR_INDEX = {color: i for i, color in enumerate(PALETTE)}
+
+NO_PIECE_STATE = (NO_PIECE, 0, 0, 0)
+
+
+def encode_row(row):
+    """Return a grid row as color indices (unknown colors count as garbage)"""
+    return bytes([COLOR_INDEX.get(color, GARBAGE_INDEX) for color in row])
+
+
+class SpectatorEncoder:
+    """Tracks the last state sent and encodes keyframes and deltas"""
+
+    def __init__(self):
+        self.tick = 0
+        self.width = 0
+        self.height = 0
+        self.rows = []
+        # Board last encoded, its version and its first filled row
+        self.board = None
+        self.version = None
+        self.top = 0
+        self.piece = NO_PIECE_STATE
+        self.next = NO_PIECE
+        self.counters = (0, 0, 0, 0)
+
+    def update(self, game):
+        """Advance one tick; return the delta bytes, or None when viewers need a keyframe"""
+        self.tick += 1
+        grid = game.grid
+        piece = game.current_piece
+        if piece is None or game.clearing_lines:
+            piece_state = NO_PIECE_STATE
+        else:
+            piece_state = (PIECE_INDEX[piece.shape_type], piece.rotation, piece.x, piece.y)
+        next_state = PIECE_INDEX[game.next_piece.shape_type] if game.next_piece else NO_PIECE
+        counters = (game.score, max(game.high_score, game.score), game.level, game.lines_cleared)
+
+        if grid.width != self.width or grid.height != self.height:
+            # The board changed shape, a delta cannot describe that
+            self.width, self.height = grid.width, grid.height
+            self.rows = [encode_row(row) for row in grid]
+            self.board, self.version, self.top = grid, grid.version, grid.top
+            self.piece, self.next, self.counters = piece_state, next_state, counters
+            return None
+
+        flags = 0
+        body = bytearray()
+        changed = []
+        rows = self.rows
+        if grid is not self.board or grid.version != self.version:
+            # Rows above both the old and the new stack are empty in both
+            for y in range(min(self.top, grid.top), self.height):
+                row = encode_row(grid[y])
+                if row != rows[y]:
+                    rows[y] = row
+                    changed.append(y)
+            self.board, self.version, self.top = grid, grid.version, grid.top
+        if changed:
+            flags |= ROWS
+            row_mask = 0
+            for y in changed:
+                row_mask |= 1 << y
+            body += row_mask.to_bytes((self.height + 7) // 8, "little")
+            for y in changed:
+                row = rows[y]
+                cell_mask = 0
+                for x, color in enumerate(row):
+                    if color:
+                        cell_mask |= 1 << x
+                body += cell_mask.to_bytes((self.width + 7) // 8, "little")
+                body += row.replace(b"\x00", b"")
+        if piece_state != self.piece:
+            flags |= PIECE
+            body += PIECE_STATE.pack(*piece_state)
+        if next_state != self.next:
+            flags |= NEXT
+            body += NEXT_STATE.pack(next_state)
+        if counters != self.counters:
+            flags |= COUNTERS
+            body += COUNTER_STATE.pack(*counters)
+
+        self.piece, self.next, self.counters = piece_state, next_state, counters
+        return FRAME_HEADER.pack(DELTA, self.tick, flags) + bytes(body)
+
+    def keyframe(self):
+        """Encode the full state of the current tick"""
+        return b"".join((
+            FRAME_HEADER.pack(KEYFRAME, self.tick, 0),
+            DIMENSIONS.pack(self.width, self.height),
+            *self.rows,
+            PIECE_STATE.pack(*self.piece),
+            NEXT_STATE.pack(self.next),
+            COUNTER_STATE.pack(*self.counters)
+        ))
+
+
+class SpectatorView:
+    """Viewer-side state rebuilt from keyframes and deltas"""
+
+    def __init__(self):
+        self.synced = False
+        self.tick = 0
+        self.width = 0
+        self.height = 0
+        self.rows = []
+        self.piece = NO_PIECE_STATE
+        self.next = NO_PIECE
+        self.counters = (0, 0, 0, 0)
+
+    def apply(self, data):
+        """Apply one frame; deltas are ignored until the first keyframe"""
+        kind, tick, flags = FRAME_HEADER.unpack_from(data)
+        offset = FRAME_HEADER.size
+        if kind == KEYFRAME:
+            self.width, self.height = DIMENSIONS.unpack_from(data, offset)
+            offset += DIMENSIONS.size
+            self.rows = []
+            for _ in range(self.height):
+                self.rows.append(bytearray(data[offset:offset + self.width]))
+                offset += self.width
+            self.piece = PIECE_STATE.unpack_from(data, offset)
+            offset += PIECE_STATE.size
+            self.next, = NEXT_STATE.unpack_from(data, offset)
+            offset += NEXT_STATE.size
+            self.counters = COUNTER_STATE.unpack_from(data, offset)
+            self.synced = True
+        elif kind == DELTA:
+            if not self.synced or tick != self.tick + 1:
+                self.synced = False
+                return False
+            if flags & ROWS:
+                row_bytes = (self.height + 7) // 8
+                cell_bytes = (self.width + 7) // 8
+                row_mask = int.from_bytes(data[offset:offset + row_bytes], "little")
+                offset += row_bytes
+                for y in range(self.height):
+                    if not row_mask >> y & 1:
+                        continue
+                    cell_mask = int.from_bytes(data[offset:offset + cell_bytes], "little")
+                    offset += cell_bytes
+                    row = self.rows[y]
+                    for x in range(self.width):
+                        if cell_mask >> x & 1:
+                            row[x] = data[offset]
+                            offset += 1
+                        else:
+                            row[x] = 0
+            if flags & PIECE:
+                self.piece = PIECE_STATE.unpack_from(data, offset)
+                offset += PIECE_STATE.size
+            if flags & NEXT:
+                self.next, = NEXT_STATE.unpack_from(data, offset)
+                offset += NEXT_STATE.size
+            if flags & COUNTERS:
+                self.counters = COUNTER_STATE.unpack_from(data, offset)
+        else:
+            return False
+        self.tick = tick
+        return True
+
+    def grid(self):
+        """Return the board as Game.grid-style color tuples"""
+        return [[PALETTE[index] for index in row] for row in self.rows]
+
+
+class Subscriber:
+    """One viewer's outgoing queue"""
+
+    def __init__(self, connection):
+        self.connection = connection
+        self.queue = deque()
+        self.ready = asyncio.Event()
+        self.needs_keyframe = True
+        self.keyframe_only = False
+        self.resync_pushed = False  # Whether a catch-up keyframe was queued since the drop
+        self.unwritten = 0          # Frames queued and not yet accepted by the transport
+        self.bytes_queued = 0
+        self.task = None
+
+    def push(self, frame):
+        self.queue.append(frame)
+        self.unwritten += 1
+        self.bytes_queued += len(frame)
+        self.ready.set()
+
+
+class SpectatorBroadcaster:
+    """Encodes a game once per tick and fans the frames out to subscribers"""
+
+    def __init__(self, keyframe_interval=SPECTATOR_KEYFRAME_INTERVAL, max_backlog=SPECTATOR_MAX_BACKLOG):
+        self.keyframe_interval = keyframe_interval
+        self.max_backlog = max_backlog
+        self.encoder = SpectatorEncoder()
+        self.subscribers = set()
+
+    def subscribe(self, connection):
+        """Start streaming to a connection; it receives a keyframe on the next tick"""
+        subscriber = Subscriber(connection)
+        subscriber.task = asyncio.create_task(self._pump(subscriber))
+        self.subscribers.add(subscriber)
+        return subscriber
+
+    def unsubscribe(self, subscriber):
+        self.subscribers.discard(subscriber)
+        subscriber.task.cancel()
+
+    def publish(self, game):
+        """Encode the game's current state and queue it for every viewer"""
+        delta = self.encoder.update(game)
+        periodic = self.encoder.tick % self.keyframe_interval == 0
+        keyframe = None
+
+        for subscriber in self.subscribers:
+            if len(subscriber.queue) >= self.max_backlog:
+                # Too slow for deltas: drop the backlog and fall back to keyframes
+                subscriber.unwritten -= len(subscriber.queue)
+                subscriber.queue.clear()
+                subscriber.keyframe_only = True
+                subscriber.resync_pushed = False
+                subscriber.needs_keyframe = True
+
+            if subscriber.keyframe_only:
+                if subscriber.resync_pushed and not subscriber.unwritten:
+                    # The transport took the catch-up keyframe and everything queued
+                    # before it: resume deltas from a fresh keyframe
+                    subscriber.keyframe_only = False
+                elif not periodic:
+                    continue
+                else:
+                    subscriber.resync_pushed = True
+                subscriber.needs_keyframe = True
+
+            if subscriber.needs_keyframe or delta is None:
+                if keyframe is None:
+                    keyframe = self.encoder.keyframe()
+                subscriber.push(keyframe)
+                subscriber.needs_keyframe = False
+            else:
+                subscriber.push(delta)
+
+    async def _pump(self, subscriber):
+        connection = subscriber.connection
+        while True:
+            await subscriber.ready.wait()
+            subscriber.ready.clear()
+            while subscriber.queue:
+                connection.send(subscriber.queue.popleft())
+                # drain() returns once the transport buffer is below its high-water
+                # mark: that is the progress publish() waits for to end catch-up
+                await connection.drain()
+                subscriber.unwritten -= 1
+
+    async def serve(self, host="0.0.0.0", port=SPECTATOR_PORT):
+        """Accept TCP viewers until cancelled"""
+        async def handle(reader, writer):
+            connection = StreamConnection(reader, writer)
+            subscriber = self.subscribe(connection)
+            # Viewers send nothing; recv() returns None once they disconnect
+            while await connection.recv() is not None:
+                pass
+            self.unsubscribe(subscriber)
+
+        server = await asyncio.start_server(handle, host, port)
+        async with server:
+            await server.serve_forever()
+
+
+async def stream_bot_games(broadcaster, seed=0):
+    """Play random bot games forever at game speed, publishing every tick"""
+    from game import Game
+
+    controller = random_controller(seed)
+    game = Game(None, None, seed=seed)
+    while True:
+        bot_step(game, controller)
+        if game.game_over:
+            game.reset()
+        broadcaster.publish(game)
+        await asyncio.sleep(REPLAY_TICK)
+
+
+def draw_view(screen, view, font, cell_size=30):
+    """Draw a SpectatorView's board and counters"""
+    import pygame
+    from tetrimino import Tetrimino
+
+    screen.fill(BG_COLOR)
+    offset_x = (screen.get_width() - view.width * cell_size) // 2
+    offset_y = (screen.get_height() - view.height * cell_size) // 2
+    for y, row in enumerate(view.rows):
+        for x, index in enumerate(row):
+            rect = (offset_x + x * cell_size, offset_y + y * cell_size, cell_size, cell_size)
+            if index:
+                pygame.draw.rect(screen, PALETTE[index], rect)
+            else:
+                pygame.draw.rect(screen, GRID_COLOR, rect, 1)
+
+    shape, rotation, x, y = view.piece
+    if shape != NO_PIECE:
+        piece = Tetrimino(PIECE_TYPES[shape], x, y)
+        piece.rotation = rotation
+        for block_x, block_y in piece.get_blocks():
+            if block_y >= 0:
+                rect = (offset_x + block_x * cell_size, offset_y + block_y * cell_size, cell_size, cell_size)
+                pygame.draw.rect(screen, piece.color, rect)
+
+    score, _, level, lines = view.counters
+    text = font.render(f"SCORE {score}   LEVEL {level}   LINES {lines}", True, WHITE)
+    screen.blit(text, (10, 10))
+
+
+async def watch(host, port):
+    """Connect to a spectator feed and draw it"""
+    import pygame
+
+    pygame.init()
+    screen = pygame.display.set_mode((800, 700))
+    pygame.display.set_caption("Tetris - Spectator")
+    font = pygame.font.SysFont('Arial', 24)
+    reader, writer = await asyncio.open_connection(host, port)
+    connection = StreamConnection(reader, writer)
+    view = SpectatorView()
+    while True:
+        data = await connection.recv()
+        if data is None:
+            break
+        if pygame.event.peek(pygame.QUIT):
+            break
+        pygame.event.pump()
+        if view.apply(data):
+            draw_view(screen, view, font)
+            pygame.display.flip()
+    pygame.quit()
+
+
+async def bench(viewers, ticks):
+    """Fan a bot game out to loopback viewers and check they all stay in sync"""
+    from game import Game
+
+    broadcaster = SpectatorBroadcaster()
+    views = []
+    readers = []
+    for _ in range(viewers):
+        server_end, viewer_end = loopback_pair()
+        broadcaster.subscribe(server_end)
+        view = SpectatorView()
+        views.append(view)
+
+        async def read(view=view, connection=viewer_end):
+            while True:
+                view.apply(await connection.recv())
+        readers.append(asyncio.create_task(read()))
+
+    controller = random_controller(0)
+    game = Game(None, None, seed=0)
+    start = time.perf_counter()
+    for _ in range(ticks):
+        bot_step(game, controller)
+        if game.game_over:
+            game.reset()
+        broadcaster.publish(game)
+        await asyncio.sleep(0)
+    elapsed = time.perf_counter() - start
+    # Let the pumps and readers deliver the last frames
+    for _ in range(3):
+        await asyncio.sleep(0)
+    for reader in readers:
+        reader.cancel()
+    sent = sum(subscriber.bytes_queued for subscriber in broadcaster.subscribers)
+
+    board = [list(row) for row in game.grid]
+    in_sync = sum(view.grid() == board for view in views)
+    print(f"{viewers} viewers, {ticks} ticks in {elapsed:.2f} s, "
+          f"{sent / max(1, viewers * ticks):.1f} bytes per viewer per tick, {in_sync} in sync")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Tetris spectator feed")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    serve_parser = subparsers.add_parser("serve", help="stream a bot game to viewers")
+    serve_parser.add_argument("--port", type=int, default=SPECTATOR_PORT)
+    watch_parser = subparsers.add_parser("watch", help="watch a spectator feed")
+    watch_parser.add_argument("host")
+    watch_parser.add_argument("--port", type=int, default=SPECTATOR_PORT)
+    bench_parser = subparsers.add_parser("bench", help="fan a bot game out to loopback viewers")
+    bench_parser.add_argument("--viewers", type=int, default=500)
+    bench_parser.add_argument("--ticks", type=int, default=600)
+    args = parser.parse_args()
+
+    if args.command == "serve":
+        async def serve():
+            broadcaster = SpectatorBroadcaster()
+            await asyncio.gather(broadcaster.serve(port=args.port), stream_bot_games(broadcaster))
+        asyncio.run(serve())
+    elif args.command == "watch":
+        asyncio.run(watch(args.host, args.port))
+    else:
+        asyncio.run(bench(args.viewers, args.ticks))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,123 @@
+import queue
+import struct
+import threading
+from constants import PIECE_TYPES, TELEMETRY_FLUSH_BYTES
+
+# File header: magic, format version, record size
+MAGIC = b"TTLM"
+VERSION = 1
+HEADER = struct.Struct("<4sHH")
+
+# One fixed-size record per event so analytics can map files as arrays:
+# game, time_ms, event, piece, rotation, arg, x, y, value
+RECORD = struct.Struct("<IIBBBBhhI")
+
+# Event types
+GAME_START = 0  # value = seed
+SPAWN = 1       # piece, rotation, x, y
+MOVE = 2        # piece, rotation, x, y after a player move
+ROTATE = 3      # arg = index of the wall kick used
+DROP = 4        # value = hard drop distance
+LOCK = 5        # final position, arg = stack height, value = decision time in ms
+CLEAR = 6       # arg = lines cleared, value = score after the clear
+LEVEL = 7       # arg = new level
+GAME_OVER = 8   # value = final score
+
+EVENT_NAMES = ("game_start", "spawn", "move", "rotate", "drop", "lock", "clear", "level", "game_over")
+
+PIECE_INDEX = {shape: i for i, shape in enumerate(PIECE_TYPES)}
+NO_PIECE = 255
+
+# Sentinel telling the writer thread to exit
+_STOP = object()
+
+
+class TelemetryWriter:
+    """Append-only binary event log with batched background writes.
+
+    emit() packs the event into an in-memory buffer; full buffers are handed
+    to a writer thread so the game loop only ever pays for a struct.pack.
+    """
+
+    def __init__(self, path, flush_bytes=TELEMETRY_FLUSH_BYTES):
+        self.path = path
+        self.flush_bytes = flush_bytes
+        self.games = 0
+        self._buffer = bytearray()
+        self._queue = queue.Queue()
+
+        with open(path, "ab") as f:
+            if f.tell() == 0:
+                f.write(HEADER.pack(MAGIC, VERSION, RECORD.size))
+            else:
+                # Continue numbering after the games already in the file
+                self.games = last_game_id(path) + 1
+
+        self._writer = threading.Thread(target=self._run, name="telemetry-writer", daemon=True)
+        self._writer.start()
+
+    def begin_game(self, seed, time_ms=0):
+        """Start a new game in the log and return its id"""
+        game_id = self.games
+        self.games += 1
+        self._buffer += RECORD.pack(game_id, time_ms, GAME_START, NO_PIECE, 0, 0, 0, 0, seed)
+        return game_id
+
+    def emit(self, game_id, time_ms, event, piece=NO_PIECE, rotation=0, arg=0, x=0, y=0, value=0):
+        """Record one event"""
+        self._buffer += RECORD.pack(game_id, time_ms, event, piece, rotation, arg, x, y, value)
+        if len(self._buffer) >= self.flush_bytes:
+            self.flush()
+
+    def flush(self):
+        """Hand the buffered events to the writer thread"""
+        if self._buffer:
+            self._queue.put(bytes(self._buffer))
+            self._buffer.clear()
+
+    def close(self):
+        """Write every pending event and stop the writer thread"""
+        self.flush()
+        self._queue.put(_STOP)
+        self._writer.join()
+
+    def _run(self):
+        """Writer thread: append queued batches to the log"""
+        with open(self.path, "ab") as f:
+            while True:
+                batch = self._queue.get()
+                if batch is _STOP:
+                    break
+                chunks = [batch]
+                while True:
+                    try:
+                        batch = self._queue.get_nowait()
+                    except queue.Empty:
+                        break
+                    if batch is _STOP:
+                        self._queue.put(_STOP)
+                        break
+                    chunks.append(batch)
+                f.write(b"".join(chunks))
+                f.flush()
+
+
+def read_header(f):
+    """Validate a log header and return the record size"""
+    magic, version, record_size = HEADER.unpack(f.read(HEADER.size))
+    if magic != MAGIC or version != VERSION or record_size != RECORD.size:
+        raise ValueError(f"{getattr(f, 'name', 'log')} is not a version {VERSION} telemetry log")
+    return record_size
+
+
+def last_game_id(path):
+    """Return the id of the last game recorded in a log, or -1"""
+    with open(path, "rb") as f:
+        read_header(f)
+        f.seek(0, 2)
+        size = f.tell() - HEADER.size
+        count = size // RECORD.size
+        if count == 0:
+            return -1
+        f.seek(HEADER.size + (count - 1) * RECORD.size)
+        return RECORD.unpack(f.read(RECORD.size))[0]
@@ -0,0 +1,156 @@
+"""Aggregate gameplay telemetry logs written by telemetry.TelemetryWriter.
+
+Each log is memory-mapped as a NumPy record array and reduced with vectorized
+operations, one file at a time, so memory stays flat however many games the
+logs hold.
+
+Usage: python telemetry_stats.py LOG [LOG ...] [--bucket SECONDS]
+
+Requires NumPy.
+"""
+import argparse
+import os
+import sys
+import numpy as np
+import telemetry
+
+RECORD_DTYPE = np.dtype([
+    ("game", "<u4"),
+    ("time_ms", "<u4"),
+    ("event", "u1"),
+    ("piece", "u1"),
+    ("rotation", "u1"),
+    ("arg", "u1"),
+    ("x", "<i2"),
+    ("y", "<i2"),
+    ("value", "<u4")
+])
+assert RECORD_DTYPE.itemsize == telemetry.RECORD.size
+
+MAX_KICKS = 5
+MAX_CLEAR = 4
+DECISION_BIN_MS = 10
+DECISION_BINS = 6000  # Decision times above a minute land in the last bin
+
+
+def load_log(path):
+    """Memory-map a telemetry log as a record array (trailing partial records are ignored)"""
+    with open(path, "rb") as f:
+        telemetry.read_header(f)
+    count = (os.path.getsize(path) - telemetry.HEADER.size) // RECORD_DTYPE.itemsize
+    if count == 0:
+        return np.zeros(0, dtype=RECORD_DTYPE)
+    return np.memmap(path, dtype=RECORD_DTYPE, mode="r", offset=telemetry.HEADER.size, shape=(count,))
+
+
+class TelemetryStats:
+    """Running aggregates over any number of logs"""
+
+    def __init__(self, bucket_seconds=10):
+        self.bucket_ms = int(bucket_seconds * 1000)
+        self.games = 0
+        self.pieces = 0
+        self.game_rates = []
+        self.kicks = np.zeros(MAX_KICKS, dtype=np.int64)
+        self.clears = np.zeros(MAX_CLEAR + 1, dtype=np.int64)
+        self.decisions = np.zeros(DECISION_BINS, dtype=np.int64)
+        self.height_sum = np.zeros(0, dtype=np.float64)
+        self.height_count = np.zeros(0, dtype=np.int64)
+
+    def add(self, records):
+        """Fold one log's records into the aggregates"""
+        if len(records) == 0:
+            return
+        event = records["event"]
+        game = records["game"]
+
+        # Pieces per second for every game: locks divided by last event time
+        game_ids, game_index = np.unique(game, return_inverse=True)
+        is_lock = event == telemetry.LOCK
+        locks = np.bincount(game_index, weights=is_lock, minlength=len(game_ids))
+        duration_ms = np.zeros(len(game_ids), dtype=np.int64)
+        np.maximum.at(duration_ms, game_index, records["time_ms"])
+        played = duration_ms > 0
+        self.game_rates.append(locks[played] / (duration_ms[played] / 1000.0))
+        self.games += int(np.count_nonzero(event == telemetry.GAME_START))
+        self.pieces += int(np.count_nonzero(is_lock))
+
+        # Wall kick and line clear distributions
+        kick = records["arg"][event == telemetry.ROTATE]
+        self.kicks += np.bincount(np.minimum(kick, MAX_KICKS - 1), minlength=MAX_KICKS)
+        cleared = records["arg"][event == telemetry.CLEAR]
+        self.clears += np.bincount(np.minimum(cleared, MAX_CLEAR), minlength=MAX_CLEAR + 1)
+
+        # Decision time histogram and stack height over time, both from lock events
+        locked = records[is_lock]
+        decision_bin = np.minimum(locked["value"] // DECISION_BIN_MS, DECISION_BINS - 1)
+        self.decisions += np.bincount(decision_bin, minlength=DECISION_BINS)
+
+        bucket = locked["time_ms"] // self.bucket_ms
+        buckets = int(bucket.max()) + 1 if len(bucket) else 0
+        if buckets > len(self.height_sum):
+            self.height_sum = np.pad(self.height_sum, (0, buckets - len(self.height_sum)))
+            self.height_count = np.pad(self.height_count, (0, buckets - len(self.height_count)))
+        self.height_sum[:buckets] += np.bincount(bucket, weights=locked["arg"], minlength=buckets)
+        self.height_count[:buckets] += np.bincount(bucket, minlength=buckets)
+
+    def decision_percentile(self, q):
+        """Approximate decision time percentile in ms"""
+        total = self.decisions.sum()
+        if total == 0:
+            return 0
+        index = np.searchsorted(np.cumsum(self.decisions), q / 100.0 * total)
+        return int(index) * DECISION_BIN_MS
+
+    def report(self):
+        """Return a human-readable summary"""
+        rates = np.concatenate(self.game_rates) if self.game_rates else np.zeros(0)
+        lines = [
+            f"Games: {self.games}",
+            f"Pieces: {self.pieces}",
+        ]
+        if len(rates):
+            lines.append(
+                f"Pieces per second: mean {rates.mean():.2f}, "
+                f"median {np.median(rates):.2f}, max {rates.max():.2f}"
+            )
+        lines.append(
+            f"Decision time: median {self.decision_percentile(50)} ms, "
+            f"p95 {self.decision_percentile(95)} ms"
+        )
+
+        total_kicks = self.kicks.sum()
+        lines.append("Wall kicks used:")
+        for index, count in enumerate(self.kicks):
+            share = count / total_kicks * 100 if total_kicks else 0
+            lines.append(f"  kick {index}: {count} ({share:.1f}%)")
+
+        lines.append("Line clears:")
+        for size, count in enumerate(self.clears[1:], start=1):
+            lines.append(f"  {size} line{'s' if size > 1 else ''}: {count}")
+
+        lines.append(f"Average stack height per {self.bucket_ms // 1000} s:")
+        with np.errstate(invalid="ignore", divide="ignore"):
+            heights = self.height_sum / self.height_count
+        for bucket, height in enumerate(heights):
+            if self.height_count[bucket]:
+                lines.append(f"  {bucket * self.bucket_ms / 1000:>6.0f} s: {height:.2f}")
+        return "\n".join(lines)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Summarize gameplay telemetry logs")
+    parser.add_argument("logs", nargs="+", help="telemetry log files")
+    parser.add_argument("--bucket", type=float, default=10,
+                        help="time bucket for stack height, in seconds")
+    args = parser.parse_args()
+
+    stats = TelemetryStats(args.bucket)
+    for path in args.logs:
+        stats.add(load_log(path))
+    print(stats.report())
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,11 +1,66 @@
-import pygame
-from constants import *
+from functools import lru_cache
+from constants import (
+    PIECE_TYPES, COLORS, SHAPES,
+    GRID_WIDTH, GRID_HEIGHT, PIECE_APPEAR_ANIMATION_DURATION,
+    QUALITY_FULL, QUALITY_NO_BEVELS, QUALITY_SOLID_GHOST, QUALITY_NO_ANIMATIONS
+)
+from rotation import SRS, CLOCKWISE, COUNTER_CLOCKWISE
+
+
+@lru_cache(maxsize=None)
+def bevel_colors(color):
+    """Return the (darker, lighter) shades used for a block's border and highlight"""
+    return tuple(max(0, c - 40) for c in color), tuple(min(255, c + 40) for c in color)
+
+
+def draw_block(surface, color, rect, bevel=True):
+    """Draw one block, with a darker border and a top/left highlight when bevelled"""
+    import pygame
+    
+    if not bevel:
+        surface.fill(color, rect)
+        return
+    darker_color, lighter_color = bevel_colors(color)
+    pygame.draw.rect(surface, color, rect)
+    pygame.draw.rect(surface, darker_color, rect, 1)
+    pygame.draw.line(surface, lighter_color, (rect.left + 1, rect.top + 1), (rect.right - 2, rect.top + 1))
+    pygame.draw.line(surface, lighter_color, (rect.left + 1, rect.top + 1), (rect.left + 1, rect.bottom - 2))
+
+
+def collides(grid, x, y, blocks):
+    """Check if blocks placed at (x, y) hit the board or its boundaries"""
+    # If grid is empty or not initialized, only check default boundaries
+    if not grid:
+        for block_x, block_y in blocks:
+            block_x += x
+            if block_x < 0 or block_x >= GRID_WIDTH or block_y + y >= GRID_HEIGHT:
+                return True
+        return False
+    
+    width = grid.width
+    height = grid.height
+    top = grid.top
+    stack = grid.stack
+    for block_x, block_y in blocks:
+        block_x += x
+        block_y += y
+        # Check boundaries
+        if block_x < 0 or block_x >= width or block_y >= height:
+            return True
+        
+        # Check collision with placed blocks (rows above the stack are empty)
+        if block_y >= top and stack[height - 1 - block_y][block_x]:
+            return True
+    
+    return False
+
 
 class Tetrimino:
-    def __init__(self, shape_type, x, y):
+    def __init__(self, shape_type, x, y, rotation_system=SRS):
         self.shape_type = shape_type
         self.color = COLORS[shape_type]
         self.shapes = SHAPES[shape_type]
+        self.kick_table = rotation_system[PIECE_TYPES.index(shape_type)]
         self.rotation = 0
         self.x = x
         self.y = y
@@ -13,6 +68,8 @@ class Tetrimino:
         self.ghost_y = 0
         # Initialize ghost position without checking grid
         self.ghost_y = self.y
+        # Index of the wall kick used by the last successful rotation
+        self.last_kick = 0
     
     def get_blocks(self):
         """Returns the current blocks positions"""
@@ -39,114 +96,58 @@ class Tetrimino:
     
     def rotate(self, grid, clockwise=True):
         """Rotate the tetrimino with wall kick"""
-        old_rotation = self.rotation
-        
-        # Calculate new rotation
-        if clockwise:
-            self.rotation = (self.rotation + 1) % 4
-        else:
-            self.rotation = (self.rotation - 1) % 4
-        
-        # Get wall kick data
-        if self.shape_type == 'I':
-            kick_data = WALL_KICK_I
-        else:
-            kick_data = WALL_KICK_DATA
-        
-        # Determine which transition we're making
-        if clockwise:
-            transition = f"{old_rotation}->{self.rotation}"
-        else:
-            transition = f"{self.rotation}->{old_rotation}"
-            # Reverse the offsets for counter-clockwise rotation
-            if transition in kick_data:
-                kick_offsets = [(-x, -y) for x, y in kick_data[transition]]
-            else:
-                # Fallback if transition not found
-                kick_offsets = [(0, 0)]
+        target, kicks = self.kick_table[self.rotation][CLOCKWISE if clockwise else COUNTER_CLOCKWISE]
         
-        # Try each wall kick offset
-        if transition in kick_data:
-            kick_offsets = kick_data[transition]
-        else:
-            kick_offsets = [(0, 0)]
-        
-        for offset_x, offset_y in kick_offsets:
-            self.x += offset_x
-            self.y += offset_y
-            
-            if not self.collision(grid):
-                # Found a valid position
+        # Try each wall kick; the table already holds the kicked target blocks
+        for kick_index, (offset_x, offset_y, blocks) in enumerate(kicks):
+            if not collides(grid, self.x, self.y, blocks):
+                self.rotation = target
+                self.x += offset_x
+                self.y += offset_y
+                self.last_kick = kick_index
                 self.update_ghost_position(grid)
                 return True
-            
-            # Reset position and try next offset
-            self.x -= offset_x
-            self.y -= offset_y
         
-        # If no valid position found, revert rotation
-        self.rotation = old_rotation
         return False
     
     def collision(self, grid):
         """Check if the tetrimino collides with the grid or boundaries"""
-        # If grid is empty or not initialized, only check boundaries
-        if not grid:
-            for x, y in self.get_blocks():
-                if x < 0 or x >= GRID_WIDTH or y >= GRID_HEIGHT:
-                    return True
-            return False
-            
-        for x, y in self.get_blocks():
-            # Check boundaries
-            if x < 0 or x >= GRID_WIDTH or y >= GRID_HEIGHT:
-                return True
-            
-            # Check collision with placed blocks (only if block is in the grid)
-            if y >= 0 and grid[y][x]:
-                return True
-        
-        return False
+        return collides(grid, self.x, self.y, self.shapes[self.rotation])
     
     def update_ghost_position(self, grid):
         """Update the ghost piece position"""
+        self.ghost_y = self.y
+        
         # If grid is empty or not initialized, don't update ghost position
         if not grid:
-            self.ghost_y = self.y
             return
-            
-        self.ghost_y = self.y
+        
+        # Rows above the stack are empty: jump straight to just above it
+        blocks = self.shapes[self.rotation]
+        lowest = max(block_y for _, block_y in blocks)
+        self.ghost_y = max(self.y, grid.top - 1 - lowest)
         
         # Move ghost piece down until collision
-        while True:
+        while not collides(grid, self.x, self.ghost_y + 1, blocks):
             self.ghost_y += 1
-            ghost_blocks = self.get_ghost_blocks()
-            
-            # Check if any block is out of bounds or collides
-            collision = False
-            for x, y in ghost_blocks:
-                if y >= GRID_HEIGHT or x < 0 or x >= GRID_WIDTH:
-                    collision = True
-                    break
-                if y >= 0 and grid[y][x]:
-                    collision = True
-                    break
-            
-            if collision:
-                self.ghost_y -= 1
-                break
     
     def hard_drop(self, grid):
         """Drop the tetrimino to the lowest possible position"""
-        drop_distance = 0
-        while self.move(0, 1, grid):
-            drop_distance += 1
+        self.update_ghost_position(grid)
+        drop_distance = self.ghost_y - self.y
+        self.y = self.ghost_y
         return drop_distance
     
-    def draw(self, screen, offset_x, offset_y, cell_size):
+    def draw(self, screen, offset_x, offset_y, cell_size, quality=QUALITY_FULL):
         """Draw the tetrimino on the screen"""
-        # Draw ghost piece first (semi-transparent)
-        ghost_color = (*self.color, 80)  # Add alpha for transparency
+        import pygame
+        
+        # Draw ghost piece first: translucent, or only its outline on cheaper tiers
+        ghost = None
+        if quality < QUALITY_SOLID_GHOST:
+            ghost = pygame.Surface((cell_size, cell_size), pygame.SRCALPHA)
+            ghost.fill((*self.color, 80))
+            pygame.draw.rect(ghost, (*self.color, 120), (0, 0, cell_size, cell_size), 1)
         for x, y in self.get_ghost_blocks():
             if y >= 0:  # Only draw if block is in the visible grid
                 ghost_rect = pygame.Rect(
@@ -154,11 +155,20 @@ class Tetrimino:
                     offset_y + y * cell_size,
                     cell_size, cell_size
                 )
-                pygame.draw.rect(screen, ghost_color, ghost_rect)
-                pygame.draw.rect(screen, (*ghost_color[:3], 120), ghost_rect, 1)
+                if ghost:
+                    screen.blit(ghost, ghost_rect)
+                else:
+                    pygame.draw.rect(screen, self.color, ghost_rect, 1)
+        
+        # Draw actual piece, fading in while it appears
+        bevel = quality < QUALITY_NO_BEVELS
+        block_surface = None
+        if self.appearance_timer > 0 and quality < QUALITY_NO_ANIMATIONS:
+            alpha = min(255, int(255 * (1 - self.appearance_timer / PIECE_APPEAR_ANIMATION_DURATION)))
+            block_surface = pygame.Surface((cell_size, cell_size))
+            draw_block(block_surface, self.color, block_surface.get_rect(), bevel)
+            block_surface.set_alpha(alpha)
         
-        # Draw actual piece with appearance animation
-        alpha = min(255, int(255 * (1 - self.appearance_timer / PIECE_APPEAR_ANIMATION_DURATION)))
         for x, y in self.get_blocks():
             if y >= 0:  # Only draw if block is in the visible grid
                 block_rect = pygame.Rect(
@@ -166,21 +176,10 @@ class Tetrimino:
                     offset_y + y * cell_size,
                     cell_size, cell_size
                 )
-                
-                # Create a surface for the block with alpha
-                block_surface = pygame.Surface((cell_size, cell_size), pygame.SRCALPHA)
-                pygame.draw.rect(block_surface, (*self.color, alpha), (0, 0, cell_size, cell_size))
-                
-                # Draw a slightly darker border
-                darker_color = tuple(max(0, c - 40) for c in self.color)
-                pygame.draw.rect(block_surface, (*darker_color, alpha), (0, 0, cell_size, cell_size), 1)
-                
-                # Add a highlight on top/left edges
-                lighter_color = tuple(min(255, c + 40) for c in self.color)
-                pygame.draw.line(block_surface, (*lighter_color, alpha), (1, 1), (cell_size - 2, 1))
-                pygame.draw.line(block_surface, (*lighter_color, alpha), (1, 1), (1, cell_size - 2))
-                
-                screen.blit(block_surface, block_rect)
+                if block_surface:
+                    screen.blit(block_surface, block_rect)
+                else:
+                    draw_block(screen, self.color, block_rect, bevel)
     
     def update(self, dt):
         """Update the tetrimino's appearance animation"""
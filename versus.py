@@ -0,0 +1,432 @@
+"""Versus mode: an asyncio lockstep server relaying inputs and garbage.
+
+Every client runs its own Game from the match seed. Each tick a client sends
+one input packet (the actions it wants applied VERSUS_INPUT_DELAY ticks later
+and the garbage its last tick produced). Once the server holds a packet from
+every live player for a tick it broadcasts one frame with everybody's inputs
+and the garbage routed to each player, and clients only simulate confirmed
+frames, so all of them stay in lockstep.
+
+Transports only need send(bytes) and an async recv() returning None on
+disconnect: StreamConnection runs over TCP, loopback_pair() connects two ends
+in-process for tests and benchmarks.
+
+Usage:
+    python versus.py server [--port PORT] [--players N] [--width N] [--height N]
+    python versus.py client HOST [--port PORT]
+    python versus.py bench [--matches N] [--players N] [--width N] [--height N]
+"""
+import argparse
+import asyncio
+import random
+import struct
+import sys
+import time
+from collections import deque
+import replay
+from board import Board
+from constants import (
+    GRID_WIDTH, GRID_HEIGHT, REPLAY_TICK, VERSUS_PORT, VERSUS_PLAYERS, VERSUS_INPUT_DELAY, GARBAGE_LINES
+)
+
+# Packet types (first byte of every packet)
+START = 1  # server -> client: seed, player index, player count, board width and height
+INPUT = 2  # client -> server: tick, input bits, garbage sent
+FRAME = 3  # server -> client: tick, then inputs, incoming garbage and hole per player
+END = 4    # server -> client: winner index (255 for none)
+
+START_PACKET = struct.Struct("<BIBBBH")
+INPUT_PACKET = struct.Struct("<BIBB")
+FRAME_HEADER = struct.Struct("<BIB")
+FRAME_PLAYER = struct.Struct("<BBB")
+END_PACKET = struct.Struct("<BB")
+LENGTH = struct.Struct("<I")
+
+# Input bits are replay.input_bits; bit 0 (NOOP) flags a topped-out player
+TOPPED_OUT = 1
+
+NO_WINNER = 255
+
+
+class LoopbackConnection:
+    """One end of an in-process connection"""
+
+    def __init__(self):
+        self.peer = None
+        self._inbox = asyncio.Queue()
+
+    def send(self, data):
+        self.peer._inbox.put_nowait(data)
+
+    async def recv(self):
+        return await self._inbox.get()
+
+    async def drain(self):
+        """Nothing is buffered in-process; kept for parity with StreamConnection"""
+
+    def close(self):
+        self.peer._inbox.put_nowait(None)
+
+
+def loopback_pair():
+    """Return two connected LoopbackConnection ends"""
+    a, b = LoopbackConnection(), LoopbackConnection()
+    a.peer, b.peer = b, a
+    return a, b
+
+
+class StreamConnection:
+    """Length-prefixed packets over asyncio streams"""
+
+    def __init__(self, reader, writer):
+        self.reader = reader
+        self.writer = writer
+        self.closed = asyncio.get_running_loop().create_future()
+
+    def send(self, data):
+        if not self.writer.is_closing():
+            self.writer.write(LENGTH.pack(len(data)) + data)
+
+    async def drain(self):
+        """Wait until the socket buffer is below its high-water mark"""
+        try:
+            await self.writer.drain()
+        except ConnectionError:
+            self.close()
+
+    async def recv(self):
+        try:
+            size, = LENGTH.unpack(await self.reader.readexactly(LENGTH.size))
+            return await self.reader.readexactly(size)
+        except (asyncio.IncompleteReadError, ConnectionError):
+            self.close()
+            return None
+
+    def close(self):
+        self.writer.close()
+        if not self.closed.done():
+            self.closed.set_result(None)
+
+
+class Match:
+    """Lockstep relay for one group of players"""
+
+    def __init__(self, connections, seed, width=GRID_WIDTH, height=GRID_HEIGHT):
+        self.connections = connections
+        self.seed = seed
+        self.width = width
+        self.height = height
+        self.rng = random.Random(seed)
+        self.alive = [True] * len(connections)
+        self.pending = [deque() for _ in connections]
+        self.tick = 0
+        self.winner = None
+        self.finished = asyncio.get_running_loop().create_future()
+
+    async def run(self):
+        """Start the match and return the winner's index (None if nobody won)"""
+        players = len(self.connections)
+        for index, connection in enumerate(self.connections):
+            connection.send(START_PACKET.pack(START, self.seed, index, players, self.width, self.height))
+        readers = [asyncio.create_task(self._read(index)) for index in range(players)]
+        try:
+            return await self.finished
+        finally:
+            for reader in readers:
+                reader.cancel()
+
+    async def _read(self, index):
+        connection = self.connections[index]
+        while not self.finished.done():
+            data = await connection.recv()
+            if data is None:
+                # A disconnect counts as topping out
+                self.pending[index].append((TOPPED_OUT, 0))
+                self._advance()
+                return
+            if data[0] != INPUT:
+                continue
+            _, tick, bits, garbage = INPUT_PACKET.unpack(data)
+            self.pending[index].append((bits, garbage))
+            self._advance()
+
+    def _next_target(self, sender):
+        """Route garbage to the next live player after the sender"""
+        players = len(self.alive)
+        for step in range(1, players):
+            target = (sender + step) % players
+            if self.alive[target]:
+                return target
+        return None
+
+    def _advance(self):
+        """Broadcast every tick for which all live players have sent input"""
+        players = len(self.connections)
+        while not self.finished.done() and all(self.pending[i] for i in range(players) if self.alive[i]):
+            packets = [self.pending[i].popleft() if self.alive[i] else (0, 0) for i in range(players)]
+            incoming = [0] * players
+            for sender, (bits, garbage) in enumerate(packets):
+                if bits & TOPPED_OUT:
+                    self.alive[sender] = False
+                elif garbage:
+                    target = self._next_target(sender)
+                    if target is not None:
+                        incoming[target] += garbage
+
+            frame = bytearray(FRAME_HEADER.pack(FRAME, self.tick, players))
+            for i, (bits, _) in enumerate(packets):
+                garbage = min(incoming[i], 255)
+                hole = self.rng.randrange(self.width) if garbage else 0
+                frame += FRAME_PLAYER.pack(bits, garbage, hole)
+            frame = bytes(frame)
+            for i, connection in enumerate(self.connections):
+                if self.alive[i]:
+                    connection.send(frame)
+            self.tick += 1
+
+            survivors = [i for i in range(players) if self.alive[i]]
+            if len(survivors) <= 1:
+                self._finish(survivors[0] if survivors else None)
+
+    def _finish(self, winner):
+        self.winner = winner
+        packet = END_PACKET.pack(END, NO_WINNER if winner is None else winner)
+        for connection in self.connections:
+            connection.send(packet)
+        self.finished.set_result(winner)
+
+
+class VersusServer:
+    """Groups incoming connections into matches and runs them concurrently"""
+
+    def __init__(self, players_per_match=VERSUS_PLAYERS, width=GRID_WIDTH, height=GRID_HEIGHT):
+        Board(width, height)  # Raises ValueError for an unsupported board size
+        self.players_per_match = players_per_match
+        self.width = width
+        self.height = height
+        self.waiting = []
+        self.matches = set()
+        self.results = []
+
+    def join(self, connection):
+        """Queue a connection; a match starts once enough players are waiting"""
+        self.waiting.append(connection)
+        if len(self.waiting) >= self.players_per_match:
+            players = self.waiting[:self.players_per_match]
+            del self.waiting[:self.players_per_match]
+            task = asyncio.create_task(self._run_match(players))
+            self.matches.add(task)
+            task.add_done_callback(self.matches.discard)
+
+    async def _run_match(self, connections):
+        match = Match(connections, random.randrange(2 ** 32), self.width, self.height)
+        winner = await match.run()
+        self.results.append((match.seed, match.tick, winner))
+        for connection in connections:
+            if isinstance(connection, StreamConnection):
+                connection.close()
+
+    async def serve(self, host="0.0.0.0", port=VERSUS_PORT):
+        """Accept TCP players forever"""
+        async def handle(reader, writer):
+            connection = StreamConnection(reader, writer)
+            self.join(connection)
+            await connection.closed
+
+        server = await asyncio.start_server(handle, host, port)
+        async with server:
+            await server.serve_forever()
+
+
+class VersusClient:
+    """Runs one player's Game in lockstep with the server.
+
+    `controller(game)` is called once per tick and returns the input bits to
+    send; when a screen is given the game is drawn after every frame. With
+    realtime set the client paces its inputs to REPLAY_TICK.
+    """
+
+    def __init__(self, connection, controller, screen=None, font=None, realtime=False):
+        self.connection = connection
+        self.controller = controller
+        self.screen = screen
+        self.font = font
+        self.realtime = realtime
+        self.game = None
+        self.index = None
+        self.winner = None
+
+    async def run(self):
+        """Play until the match ends; return the winner's index or None"""
+        from game import Game
+
+        data = await self.connection.recv()
+        if data is None:
+            return None
+        _, seed, self.index, _, width, height = START_PACKET.unpack(data)
+        self.game = game = Game(self.screen, self.font, seed=seed, width=width, height=height)
+
+        # Prime the input delay with empty packets
+        for tick in range(VERSUS_INPUT_DELAY):
+            self.connection.send(INPUT_PACKET.pack(INPUT, tick, 0, 0))
+        next_tick = VERSUS_INPUT_DELAY
+        garbage_out = 0
+        reported_out = False
+        loop = asyncio.get_running_loop()
+        start_time = loop.time()
+
+        while True:
+            data = await self.connection.recv()
+            if data is None:
+                return None
+            if data[0] == END:
+                winner = END_PACKET.unpack(data)[1]
+                self.winner = None if winner == NO_WINNER else winner
+                return self.winner
+            if data[0] != FRAME:
+                continue
+
+            bits, incoming, hole = FRAME_PLAYER.unpack_from(
+                data, FRAME_HEADER.size + self.index * FRAME_PLAYER.size
+            )
+            if not game.game_over:
+                lines_before = game.lines_cleared
+                if incoming:
+                    game.add_garbage(incoming, hole)
+                for action in replay.INPUT_ACTIONS:
+                    if bits & (1 << action):
+                        replay.apply_action(game, action)
+                game.update(REPLAY_TICK)
+                garbage_out += GARBAGE_LINES[min(game.lines_cleared - lines_before, 4)]
+                if self.screen is not None:
+                    self._draw()
+
+            if reported_out:
+                continue
+            if self.realtime:
+                # Hold the input for a tick until its slot so the match runs at game speed
+                await asyncio.sleep(max(0, start_time + (next_tick - VERSUS_INPUT_DELAY) * REPLAY_TICK - loop.time()))
+            if game.game_over:
+                self.connection.send(INPUT_PACKET.pack(INPUT, next_tick, TOPPED_OUT, 0))
+                reported_out = True
+            else:
+                sent = min(garbage_out, 255)
+                garbage_out -= sent
+                self.connection.send(INPUT_PACKET.pack(INPUT, next_tick, self.controller(game), sent))
+            next_tick += 1
+
+    def _draw(self):
+        import pygame
+
+        self.screen.fill((20, 20, 30))
+        self.game.draw()
+        pygame.display.flip()
+
+
+def random_controller(seed):
+    """Return a controller that plays random moves (for benchmarks and tests)"""
+    rng = random.Random(seed)
+    moves = (
+        replay.input_bits(replay.LEFT), replay.input_bits(replay.RIGHT), replay.input_bits(replay.ROTATE_CW),
+        replay.input_bits(replay.ROTATE_CCW), replay.input_bits(replay.HARD_DROP)
+    )
+
+    def controller(game):
+        return rng.choice(moves) if rng.random() < 0.2 else 0
+    return controller
+
+
+def keyboard_controller():
+    """Return a controller that reads the pygame keyboard"""
+    import pygame
+
+    keys = {
+        pygame.K_LEFT: replay.LEFT,
+        pygame.K_RIGHT: replay.RIGHT,
+        pygame.K_UP: replay.ROTATE_CW,
+        pygame.K_z: replay.ROTATE_CCW,
+        pygame.K_SPACE: replay.HARD_DROP,
+        pygame.K_DOWN: replay.SOFT_DROP_ON
+    }
+
+    def controller(game):
+        bits = 0
+        for event in pygame.event.get():
+            if event.type == pygame.QUIT:
+                raise SystemExit
+            if event.type == pygame.KEYDOWN and event.key in keys:
+                bits |= 1 << keys[event.key]
+            elif event.type == pygame.KEYUP and event.key == pygame.K_DOWN:
+                bits |= 1 << replay.SOFT_DROP_OFF
+        return bits
+    return controller
+
+
+async def run_loopback_match(players=VERSUS_PLAYERS, controllers=None, width=GRID_WIDTH, height=GRID_HEIGHT):
+    """Play one match entirely in-process; return (winner, ticks)"""
+    server = VersusServer(players, width, height)
+    clients = []
+    for index in range(players):
+        server_end, client_end = loopback_pair()
+        controller = controllers[index] if controllers else random_controller(index)
+        clients.append(VersusClient(client_end, controller))
+        server.join(server_end)
+    winners = await asyncio.gather(*(client.run() for client in clients))
+    await asyncio.gather(*server.matches)
+    return winners[0], server.results[0][1]
+
+
+async def bench(matches, players, width=GRID_WIDTH, height=GRID_HEIGHT):
+    """Run many loopback matches concurrently and report throughput"""
+    start = time.perf_counter()
+    results = await asyncio.gather(*(run_loopback_match(players, width=width, height=height) for _ in range(matches)))
+    elapsed = time.perf_counter() - start
+    ticks = sum(ticks for _, ticks in results)
+    print(f"{matches} matches, {ticks} ticks in {elapsed:.2f} s "
+          f"({ticks / elapsed:.0f} match ticks/s, {ticks * players / elapsed:.0f} player ticks/s)")
+
+
+async def play_online(host, port):
+    """Connect to a server and play with the keyboard"""
+    import pygame
+
+    pygame.init()
+    screen = pygame.display.set_mode((800, 700))
+    pygame.display.set_caption("Tetris - Versus")
+    font = pygame.font.SysFont('Arial', 24)
+    reader, writer = await asyncio.open_connection(host, port)
+    client = VersusClient(StreamConnection(reader, writer), keyboard_controller(), screen, font, realtime=True)
+    winner = await client.run()
+    print("You win!" if winner == client.index else "You lose.")
+    pygame.quit()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Tetris versus mode")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    server_parser = subparsers.add_parser("server", help="run a versus server")
+    server_parser.add_argument("--port", type=int, default=VERSUS_PORT)
+    server_parser.add_argument("--players", type=int, default=VERSUS_PLAYERS)
+    server_parser.add_argument("--width", type=int, default=GRID_WIDTH, help="board width of every match")
+    server_parser.add_argument("--height", type=int, default=GRID_HEIGHT, help="board height of every match")
+    client_parser = subparsers.add_parser("client", help="join a versus server")
+    client_parser.add_argument("host")
+    client_parser.add_argument("--port", type=int, default=VERSUS_PORT)
+    bench_parser = subparsers.add_parser("bench", help="run loopback matches between random bots")
+    bench_parser.add_argument("--matches", type=int, default=200)
+    bench_parser.add_argument("--players", type=int, default=VERSUS_PLAYERS)
+    bench_parser.add_argument("--width", type=int, default=GRID_WIDTH)
+    bench_parser.add_argument("--height", type=int, default=GRID_HEIGHT)
+    args = parser.parse_args()
+
+    if args.command == "server":
+        asyncio.run(VersusServer(args.players, args.width, args.height).serve(port=args.port))
+    elif args.command == "client":
+        asyncio.run(play_online(args.host, args.port))
+    else:
+        asyncio.run(bench(args.matches, args.players, args.width, args.height))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())